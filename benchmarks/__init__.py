@@ -0,0 +1,6 @@
+"""
+Build performance benchmarks for mlog.
+
+Run them against a synthetic blog with `python -m benchmarks`,
+see `python -m benchmarks --help` for the corpus options.
+"""
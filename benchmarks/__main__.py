@@ -0,0 +1,75 @@
+import argparse
+import json
+import tempfile
+
+from benchmarks import corpus
+from benchmarks import suite
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        prog='benchmarks',
+        description='Benchmark mlog against a synthetic blog.')
+    parser.add_argument(
+        'benchmarks',
+        nargs='*',
+        metavar='BENCHMARK',
+        help='the benchmarks to run, all by default; {0}'.format(
+            ', '.join(suite.BENCHMARKS)))
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--tags', type=int, default=50)
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--tags-per-post', type=int, default=3)
+    parser.add_argument(
+        '--body-size',
+        type=int,
+        default=3000,
+        help='approximate characters of markdown per post')
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--repeat',
+        type=int,
+        default=5,
+        help='timed runs of each benchmark, the best is reported')
+    parser.add_argument(
+        '--json',
+        metavar='PATH',
+        help='also write the results as json to PATH')
+    args = parser.parse_args(args)
+    for name in args.benchmarks:
+        if name not in suite.BENCHMARKS:
+            parser.error('unknown benchmark {0!r}'.format(name))
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix='mlog-bench-') as tmp:
+        corpus_ = corpus.generate(
+            tmp,
+            posts=args.posts,
+            tags=args.tags,
+            categories=args.categories,
+            tags_per_post=args.tags_per_post,
+            body_size=args.body_size,
+            pages=args.pages,
+            seed=args.seed)
+        context = suite.Context(corpus_, tmp)
+        print('{0:<20} {1:>12} {2:>12} {3:>12} {4:>11}'.format(
+            'benchmark', 'best', 'mean', 'peak', 'conversions'))
+        results = []
+        for result in suite.run_benchmarks(
+                context, args.benchmarks, args.repeat):
+            results.append(result)
+            print(
+                '{0:<20} {1:>10.2f}ms {2:>10.2f}ms {3:>10.1f}MB {4:>11}'
+                .format(
+                    result.name,
+                    result.best * 1000,
+                    result.mean * 1000,
+                    result.peak / 1024 / 1024,
+                    result.conversions))
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump([result._asdict() for result in results], fh, indent=2)
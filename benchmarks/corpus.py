@@ -0,0 +1,122 @@
+"""
+Synthetic blog corpus generator.
+"""
+
+import collections
+import datetime
+import pathlib
+import random
+
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim '
+    'veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea '
+    'commodo consequat duis aute irure in reprehenderit voluptate velit '
+    'esse cillum fugiat nulla pariatur excepteur sint occaecat cupidatat '
+    'non proident sunt culpa qui officia deserunt mollit anim id est'
+).split()
+
+Corpus = collections.namedtuple('Corpus', 'post_dir page_dir post_paths')
+
+
+def _sentence(rand):
+    words = rand.choices(WORDS, k=rand.randint(6, 16))
+    if rand.random() < 0.3:
+        index = rand.randrange(len(words))
+        words[index] = rand.choice(
+            ['*{0}*', '**{0}**', '`{0}`', '[{0}](http://example.com/)']
+        ).format(words[index])
+    return ' '.join(words).capitalize() + '.'
+
+
+def _body(rand, size):
+    """
+    Return roughly `size` characters of markdown.
+    """
+    blocks = []
+    length = 0
+    while length < size:
+        kind = rand.random()
+        if kind < 0.1:
+            block = '## ' + _sentence(rand)[:-1]
+        elif kind < 0.2:
+            block = '\n'.join(
+                '    ' + ' '.join(rand.choices(WORDS, k=5)) + ' &amp; <b>'
+                for _ in range(rand.randint(2, 6)))
+        elif kind < 0.3:
+            block = '\n'.join(
+                '* ' + _sentence(rand) for _ in range(rand.randint(2, 5)))
+        else:
+            block = ' '.join(
+                _sentence(rand) for _ in range(rand.randint(2, 6)))
+        blocks.append(block)
+        length += len(block) + 2
+    return '\n\n'.join(blocks)
+
+
+def _document(title, date, tags, categories, body):
+    return (
+        'title: {0}\n'
+        'date: {1}\n'
+        'tags: {2}\n'
+        'categories: {3}\n'
+        'author: Benchmark\n'
+        '\n'
+        '{4}\n').format(
+            title,
+            date.isoformat(),
+            ', '.join(tags),
+            ', '.join(categories),
+            body)
+
+
+def generate(
+        directory,
+        posts=1000,
+        tags=50,
+        categories=10,
+        tags_per_post=3,
+        body_size=3000,
+        pages=5,
+        seed=0):
+    """
+    Write a blog of `posts` posts and `pages` pages within `directory`.
+
+    Posts get `tags_per_post` tags from a pool of `tags` and one
+    category from a pool of `categories`, with bodies of roughly
+    `body_size` characters. The same arguments always generate
+    the same corpus.
+    """
+    rand = random.Random(seed)
+    directory = pathlib.Path(directory)
+    post_dir = directory.joinpath('posts')
+    page_dir = directory.joinpath('pages')
+    post_dir.mkdir(parents=True, exist_ok=True)
+    page_dir.mkdir(parents=True, exist_ok=True)
+    tag_names = ['tag {0}'.format(index) for index in range(tags)]
+    category_names = [
+        'Category {0}'.format(index) for index in range(categories)]
+    start = datetime.datetime(2010, 1, 1)
+
+    post_paths = []
+    for index in range(posts):
+        path = post_dir.joinpath('post-{0}.md'.format(index))
+        path.write_text(_document(
+            'Post {0}'.format(index),
+            start + datetime.timedelta(hours=index * 7),
+            rand.sample(tag_names, min(tags_per_post, tags)),
+            [rand.choice(category_names)] if categories else [],
+            _body(rand, body_size)))
+        post_paths.append(path)
+
+    for index in range(pages):
+        page_dir.joinpath('{0}page-{1}.md'.format(
+            chr(ord('a') + index % 26), index)).write_text(_document(
+                'Page {0}'.format(index),
+                start,
+                [],
+                [],
+                _body(rand, body_size)))
+
+    return Corpus(post_dir, page_dir, post_paths)
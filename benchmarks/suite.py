@@ -0,0 +1,257 @@
+"""
+The benchmarks and a runner measuring their time and peak memory.
+
+Each benchmark is given a `Context` and returns a `(setup, run)`
+pair; only `run` is measured and `setup` may be `None`. Along with
+its time and memory, the markdown conversions a run makes without a
+warm cache are counted.
+"""
+
+import collections
+import gc
+import os
+import pathlib
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import mlog
+from mlog import Blog, Renderer, jinja, util
+from mlog.config import blog_config as config
+
+
+BENCHMARKS = collections.OrderedDict()
+
+Result = collections.namedtuple('Result', 'name best mean peak conversions')
+
+
+class Context:
+    """
+    The corpus being benchmarked and a scratch directory
+    for build outputs and caches.
+    """
+
+    def __init__(self, corpus, directory):
+        self.corpus = corpus
+        self.directory = pathlib.Path(directory)
+        self.output_dir = self.directory.joinpath('html')
+        self.cache_dir = self.directory.joinpath('cache')
+        self._blog = None
+
+    def load(self, use_cache=False):
+        return Blog.load(
+            post_dir=self.corpus.post_dir,
+            page_dir=self.corpus.page_dir,
+            use_cache=use_cache)
+
+    @property
+    def blog(self):
+        """
+        A blog loaded once and shared by the benchmarks
+        which don't load their own.
+        """
+        if self._blog is None:
+            self._blog = self.load()
+        return self._blog
+
+    def renderer(self, blog, incremental=False):
+        return Renderer(
+            blog,
+            output_dir=self.output_dir,
+            template_env=jinja.create_env(
+                jinja.template_loader, bytecode_cache=False),
+            incremental=incremental,
+            manifest_file=self.cache_dir.joinpath('manifest.json'))
+
+    def clean(self):
+        shutil.rmtree(str(self.output_dir), ignore_errors=True)
+        shutil.rmtree(str(self.cache_dir), ignore_errors=True)
+
+
+def benchmark(func):
+    """
+    Register a benchmark.
+    """
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+@benchmark
+def load(context):
+    return None, context.load
+
+
+@benchmark
+def load_cached(context):
+    def setup():
+        context.clean()
+        context.load(use_cache=True)
+    return setup, lambda: context.load(use_cache=True)
+
+
+@benchmark
+def render(context):
+    return context.clean, lambda: context.renderer(
+        context.blog).render_to_files()
+
+
+@benchmark
+def render_unchanged(context):
+    def setup():
+        context.clean()
+        context.renderer(context.blog, incremental=True).render_to_files()
+    return setup, lambda: context.renderer(
+        context.blog, incremental=True).render_to_files()
+
+
+@benchmark
+def rebuild_one_post(context):
+    """
+    Edit one post and incrementally rebuild, loading the blog
+    through the post cache as `python -m mlog --incremental` does.
+    """
+    path = context.corpus.post_paths[len(context.corpus.post_paths) // 2]
+    original = path.read_text()
+    edits = iter(range(10 ** 9))
+
+    def setup():
+        context.clean()
+        path.write_text(original)
+        context.renderer(
+            context.load(use_cache=True), incremental=True).render_to_files()
+        path.write_text(original + '\nEdit {0}.\n'.format(next(edits)))
+
+    def run():
+        context.renderer(
+            context.load(use_cache=True), incremental=True).render_to_files()
+        path.write_text(original)
+    return setup, run
+
+
+@benchmark
+def pager(context):
+    posts = context.blog.posts
+
+    def run():
+        for _ in util.Pager(posts, config.POSTS_PER_PAGE):
+            pass
+        for _ in util.Pager(posts, config.POSTS_PER_PAGE, stable=True):
+            pass
+    return None, run
+
+
+@benchmark
+def excerpt(context):
+    contents = [post['content'] for post in context.blog.posts]
+
+    def run():
+        for content in contents:
+            util.generate_excerpt(content)
+    return None, run
+
+
+@benchmark
+def urls(context):
+    slugs = [post['slug'] for post in context.blog.posts]
+    sections = [
+        ('category', name) for name in context.blog.categories] + [
+        ('tag', name) for name in context.blog.tags]
+
+    def run():
+        builder = util.UrlBuilder(config.BASE_URL)
+        # Every listing page links to its posts and the menus.
+        for _ in range(5):
+            for slug in slugs:
+                builder('post', slug)
+            for fragments in sections:
+                builder(*fragments)
+    return None, run
+
+
+def _python(*args):
+    # The benchmarks run from a scratch directory, so make sure the
+    # mlog being benchmarked is the one importable there.
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(pathlib.Path(mlog.__file__).parent.parent)] +
+        env.get('PYTHONPATH', '').split(os.pathsep))
+    subprocess.run(
+        (sys.executable,) + args,
+        stdout=subprocess.DEVNULL,
+        env=env,
+        check=True)
+
+
+@benchmark
+def startup(context):
+    """
+    Start `python -m mlog --help` in a new interpreter, the
+    memory reported is the parent's and so meaningless.
+    """
+    return None, lambda: _python('-m', 'mlog', '--help')
+
+
+@benchmark
+def import_mlog(context):
+    return None, lambda: _python('-c', 'import mlog.blog, mlog.render')
+
+
+def measure(name, setup, run, repeat=5):
+    """
+    Time `repeat` runs of `run`, each after `setup`, then measure
+    its peak memory and count its markdown conversions in one
+    further run under tracemalloc.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    gc.collect()
+    convert = util._convert_markdown
+    conversions = 0
+
+    def counted(text):
+        nonlocal conversions
+        conversions += 1
+        return convert(text)
+
+    util._cached_convert.cache_clear()
+    util._convert_markdown = counted
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        util._convert_markdown = convert
+    return Result(
+        name, min(times), statistics.mean(times), peak, conversions)
+
+
+def run_benchmarks(context, names=None, repeat=5):
+    """
+    Run the benchmarks `names`, or all of them, yielding
+    a `Result` for each.
+    """
+    cwd = os.getcwd()
+    cache_dir = config.CACHE_DIR
+    # Keep the post cache and anything else relative out of the cwd.
+    config.CACHE_DIR = context.cache_dir
+    os.chdir(str(context.directory))
+    try:
+        for name in names or BENCHMARKS:
+            setup, run = BENCHMARKS[name](context)
+            yield measure(name, setup, run, repeat)
+    finally:
+        config.CACHE_DIR = cache_dir
+        os.chdir(cwd)
@@ -3,8 +3,32 @@ A miminmal static blog generator.
 """
 
 
-from .blog import Blog
-from .render import Renderer
+import importlib
 
 
 __all__ = ('Blog', 'Renderer')
+
+# Exports imported on first use, keeping `import mlog` fast
+# for tools which only need the config or a `Site`.
+_LAZY = {
+    'Blog': '.blog',
+    'Renderer': '.render',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    # Submodules, such as `mlog.render`, are also imported on first use.
+    if not name.startswith('_'):
+        try:
+            return importlib.import_module('.' + name, __name__)
+        except ModuleNotFoundError as error:
+            if error.name != '{0}.{1}'.format(__name__, name):
+                raise
+    raise AttributeError(
+        'module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
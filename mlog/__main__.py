@@ -1,7 +1,143 @@
-from mlog import Blog, Renderer
+import argparse
+import contextlib
+import os
+import sys
+
+from mlog.config import blog_config as config
+
+
+# Values of MLOG_PROFILE, or --profile, which aren't a report path.
+PROFILE_ON = ('', '1', 'true', 'yes', 'on')
+PROFILE_OFF = ('0', 'false', 'no', 'off')
+
+
+def profile_env():
+    """
+    Return the `--profile` default from MLOG_PROFILE, `None` when
+    it is unset or disabled.
+    """
+    value = os.environ.get('MLOG_PROFILE')
+    if value is None or value.strip().lower() in PROFILE_OFF:
+        return None
+    return value
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(
+        prog='mlog',
+        description='A miminmal static blog generator.')
+    parser.add_argument(
+        'command',
+        nargs='?',
+        choices=('build', 'serve'),
+        default='build',
+        help='build the blog or serve it with auto reloading')
+    parser.add_argument(
+        '--host',
+        default='localhost',
+        help='host for the development server')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='port for the development server')
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        default=config.INCREMENTAL,
+        help='only re-render outputs whose inputs changed')
+    parser.add_argument(
+        '--no-cache',
+        dest='use_cache',
+        action='store_false',
+        default=config.USE_CACHE,
+        help='parse every post instead of using the post cache')
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='list the files a build would write without writing them')
+    parser.add_argument(
+        '--archive',
+        metavar='PATH',
+        help='also write the built site to a tar or zip file at PATH')
+    parser.add_argument(
+        '--compile-templates',
+        metavar='PATH',
+        help='precompile the templates into a zip at PATH and exit')
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        metavar='PATH',
+        const='',
+        default=profile_env(),
+        help='print a timing report of the build, and write it to PATH; '
+             'as json for a .json PATH otherwise as cProfile stats')
+    return parser.parse_args(args)
+
+
+def build(args, profiler=None):
+    """
+    Load the blog and build, serve or dry run it.
+    """
+    # Imported here so `--help` doesn't pay for jinja and markdown.
+    from mlog import Blog, Renderer
+
+    blog = Blog(use_cache=args.use_cache)
+    renderer = Renderer(
+        blog,
+        incremental=args.incremental,
+        profiler=profiler)
+    if profiler is not None:
+        profiler.instrument(blog, 'load_posts', 'load_pages')
+        profiler.instrument(renderer, '_render_jobs', *(
+            name for name in dir(renderer) if name.startswith('_create_')))
+    blog.load_posts()
+    blog.load_pages()
+
+    markdown = contextlib.nullcontext()
+    if profiler is not None:
+        # Posts are timed as they're converted while rendering.
+        markdown = profiler.markdown(blog.posts + blog.pages)
+    with markdown:
+        if args.command == 'serve':
+            from mlog.server import DevServer
+            DevServer(blog, renderer).serve(args.host, args.port)
+        elif args.dry_run:
+            for uri in renderer.render_to_site().diff(renderer.output_dir):
+                print(uri)
+        else:
+            renderer.render_to_files(archive=args.archive)
+
+
+def profile(args):
+    """
+    Build while profiling, then report the timings.
+    """
+    from mlog.profiling import Profiler
+
+    profiler = Profiler()
+    # MLOG_PROFILE=1 only asks for the summary.
+    path = args.profile
+    if path.strip().lower() in PROFILE_ON:
+        path = None
+    stats_file = path if path and not path.endswith('.json') else None
+    with profiler.run(stats_file):
+        build(args, profiler)
+    print(profiler.summary(), file=sys.stderr)
+    if path and stats_file is None:
+        profiler.dump(path)
 
 
 if __name__ == "__main__":
-    blog = Blog.load()
-    renderer = Renderer(blog)
-    renderer.render_to_files()
+    args = parse_args()
+    if args.compile_templates:
+        from mlog import jinja
+        jinja.compile_templates(args.compile_templates)
+        raise SystemExit()
+    if args.command == 'serve':
+        # Links must point at the development server.
+        config.BASE_URL = 'http://{0}:{1}/'.format(args.host, args.port)
+    if args.profile is not None and args.command == 'build':
+        profile(args)
+    else:
+        build(args)
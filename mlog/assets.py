@@ -0,0 +1,117 @@
+"""
+Static asset bundles.
+
+Bundles concatenate CSS or JS sources into a single file named after
+a hash of its content, so it can be cached forever. CSS is minified,
+JS is only concatenated as it can't be minified safely without a
+parser. Built bundles are cached by a hash of their sources so
+unchanged bundles are not minified again.
+"""
+
+import collections
+import hashlib
+import pathlib
+import posixpath
+import re
+
+from .constants import *  # noqa
+from .util import write_atomic
+
+
+Asset = collections.namedtuple('Asset', 'name uri content')
+
+_CSS_SPLIT_RE = re.compile(
+    r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/)', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCTUATION_RE = re.compile(r' ?([{};,>]) ?')
+_CSS_COLON_RE = re.compile(r': ')
+
+
+def minify_css(text):
+    """
+    Return `text` without comments and unneeded whitespace.
+    """
+    code = []
+    for index, part in enumerate(_CSS_SPLIT_RE.split(text)):
+        # Odd parts are strings, which are kept, and comments.
+        if index % 2 == 0:
+            code.append(part)
+        elif part.startswith('/*'):
+            code.append(' ')
+        else:
+            code.append(part)
+
+    minified = []
+    for index, part in enumerate(_CSS_SPLIT_RE.split(''.join(code))):
+        if index % 2 == 0:
+            part = _CSS_SPACE_RE.sub(' ', part)
+            part = _CSS_PUNCTUATION_RE.sub(r'\1', part)
+            part = _CSS_COLON_RE.sub(':', part).replace(';}', '}')
+        minified.append(part)
+    return ''.join(minified).strip()
+
+
+# The static section, minifier and separator for each bundle type.
+BUNDLE_TYPES = {
+    '.css': (STYLE, minify_css, '\n'),
+    '.js': (SCRIPT, None, ';\n'),
+}
+
+
+def fingerprint(name, content, length=10):
+    """
+    Return `name` with a hash of `content` before its extension.
+    """
+    stem, ext = posixpath.splitext(name)
+    return '{0}.{1}{2}'.format(
+        stem, hashlib.sha1(content).hexdigest()[:length], ext)
+
+
+def build_bundle(name, sources, directory, cache_dir=None):
+    """
+    Concatenate the files `sources` within `directory` into the
+    bundle `name`, minifying CSS, and return an `Asset`.
+    """
+    section, minify, separator = BUNDLE_TYPES[posixpath.splitext(name)[1]]
+    directory = pathlib.Path(directory)
+    contents = [directory.joinpath(source).read_bytes() for source in sources]
+
+    hash_ = hashlib.sha1(VERSION.encode('utf-8'))
+    for source, content in zip(sources, contents):
+        hash_.update(str(source).encode('utf-8') + b'\0')
+        hash_.update(content + b'\0')
+    cached = None
+    if cache_dir is not None:
+        cached = pathlib.Path(cache_dir).joinpath(hash_.hexdigest())
+        if cached.is_file():
+            content = cached.read_bytes()
+            return Asset(name, _uri(section, name, content), content)
+
+    text = separator.join(content.decode('utf-8') for content in contents)
+    if minify is not None:
+        text = minify(text)
+    content = text.encode('utf-8')
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(cached, content)
+    return Asset(name, _uri(section, name, content), content)
+
+
+def build_bundles(bundles, directories, cache_dir=None):
+    """
+    Build every bundle in `bundles`, a mapping of bundle names
+    to their sources, returning a dict of names to `Asset`s.
+
+    `directories` maps each static section to the directory
+    its sources are read from.
+    """
+    assets = {}
+    for name, sources in bundles.items():
+        section = BUNDLE_TYPES[posixpath.splitext(name)[1]][0]
+        assets[name] = build_bundle(
+            name, sources, directories[section], cache_dir)
+    return assets
+
+
+def _uri(section, name, content):
+    return posixpath.join(STATIC, section, fingerprint(name, content))
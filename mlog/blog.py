@@ -1,7 +1,7 @@
-import collections
 import operator
 import pathlib
 
+from . import cache
 from . import util
 from .config import blog_config as config
 from .constants import *  # noqa
@@ -17,7 +17,9 @@ class Blog:
             title=config.TITLE,
             description=config.DESCRIPTION,
             post_dir=config.POSTS_DIR,
-            page_dir=config.PAGES_DIR):
+            page_dir=config.PAGES_DIR,
+            load_workers=config.LOAD_WORKERS,
+            use_cache=config.USE_CACHE):
 
         self.posts = []
         self.pages = []
@@ -25,6 +27,8 @@ class Blog:
         self.description = description
         self.post_dir = post_dir
         self.page_dir = page_dir
+        self.load_workers = load_workers
+        self.use_cache = use_cache
 
     @classmethod
     def load(cls, *args, **kwargs):
@@ -37,17 +41,50 @@ class Blog:
         obj.load_pages()
         return obj
 
+    @property
+    def posts(self):
+        """
+        The blog posts in chronological order, newest first.
+        """
+        return self._posts
+
+    @posts.setter
+    def posts(self, posts):
+        self._posts = posts
+        self._indexes = {}
+        self._menus = {}
+
+    @property
+    def pages(self):
+        """
+        The static pages in menu order.
+        """
+        return self._pages
+
+    @pages.setter
+    def pages(self, pages):
+        self._pages = pages
+        self._page_menu = None
+
+    @property
+    def page_menu(self):
+        """
+        A list of two tuples containing the menu name
+        and slug of each page.
+        """
+        if self._page_menu is None:
+            self._page_menu = sorted(
+                [(page['menu_name'], page['slug']) for page in self._pages],
+                key=lambda item: util.menu_key(item[0]))
+        return self._page_menu
+
     @property
     def tags(self):
         """
         Retuns a dictionary type where the keys are tags
         and the values are a list of posts tagged with key.
         """
-        tags = collections.defaultdict(list)
-        for post in self.posts:
-            for tag in post['tags']:
-                tags[tag].append(post)
-        return tags
+        return self._index('tags')
 
     @property
     def categories(self):
@@ -55,19 +92,110 @@ class Blog:
         Retuns a dictionary type where the keys are categories
         and the values are a list of posts within that category.
         """
-        categories = collections.defaultdict(list)
-        for post in self.posts:
-            for category in post['categories']:
-                categories[category].append(post)
-        return categories
+        return self._index('categories')
+
+    @property
+    def tag_menu(self):
+        """
+        The tag names in menu order.
+        """
+        return self._menu('tags')
+
+    @property
+    def category_menu(self):
+        """
+        The category names in menu order.
+        """
+        return self._menu('categories')
+
+    def _index(self, field):
+        """
+        Return the posts indexed by each value of `field`,
+        building the index the first time it is needed.
+        """
+        try:
+            return self._indexes[field]
+        except KeyError:
+            pass
+        index = self._indexes[field] = {}
+        for post in self._posts:
+            for key in dict.fromkeys(post[field]):
+                index.setdefault(key, []).append(post)
+        return index
+
+    def _menu(self, field):
+        try:
+            return self._menus[field]
+        except KeyError:
+            menu = self._menus[field] = util.sort_menu(self._index(field))
+            return menu
+
+    def add_post(self, post):
+        """
+        Add a post keeping the posts and indexes in order.
+        """
+        self._posts.insert(_insertion_index(self._posts, post), post)
+        for field in list(self._indexes):
+            index = self._indexes[field]
+            for key in dict.fromkeys(post[field]):
+                if key not in index:
+                    # New keys change the index and menu order.
+                    self._indexes.pop(field)
+                    self._menus.pop(field, None)
+                    break
+                posts = index[key]
+                posts.insert(_insertion_index(posts, post), post)
+
+    def remove_post(self, post):
+        """
+        Remove a post from the posts and indexes.
+        """
+        del self._posts[_position(self._posts, post)]
+        for field in list(self._indexes):
+            index = self._indexes[field]
+            for key in dict.fromkeys(post[field]):
+                posts = index[key]
+                del posts[_position(posts, post)]
+                if not posts:
+                    self._indexes.pop(field)
+                    self._menus.pop(field, None)
+                    break
+
+    def _open_cache(self):
+        """
+        Return the parsed post cache or `None` if caching is disabled.
+        """
+        if not self.use_cache:
+            return None
+        return cache.PostCache(
+            config.CACHE_DIR.joinpath(POST_CACHE),
+            namespace=cache.cache_namespace(
+                util.MARKDOWN_EXTENSIONS,
+                config.EXCERPT_CHAR_COUNT,
+                config.BASE_URL,
+                sorted(config.URLS.items()),
+                util.Post.__slots__))
+
+    def _read_posts(self, path, cls):
+        """
+        Read all the markdown files within `path` as `cls` instances.
+        """
+        post_cache = self._open_cache()
+        try:
+            return util.read_posts(
+                pathlib.Path(path).glob('*.md'),
+                self.load_workers,
+                post_cache,
+                cls)
+        finally:
+            if post_cache is not None:
+                post_cache.close()
 
     def load_posts(self):
         """
         Load posts from the file system.
         """
-        posts = []
-        for post in pathlib.Path(self.post_dir).glob('*.md'):
-            posts.append(util.read_post(post))
+        posts = self._read_posts(self.post_dir, util.Post)
         self.posts = list(sorted(
             posts,
             key=operator.itemgetter('date'),
@@ -77,9 +205,32 @@ class Blog:
         """
         Load static pages from the file system.
         """
-        pages = []
-        for path in pathlib.Path(self.page_dir).glob('*.md'):
-            pages.append(util.read_post(path))
+        pages = self._read_posts(self.page_dir, util.Page)
         self.pages = list(sorted(
             pages,
             key=lambda k: SORT_ORDER.find(k['menu_name'][0].lower())))
+
+
+def _insertion_index(posts, post):
+    """
+    Return the index to insert `post` into the newest first
+    list of `posts`, after any posts of the same date.
+    """
+    low, high = 0, len(posts)
+    while low < high:
+        middle = (low + high) // 2
+        if posts[middle]['date'] < post['date']:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def _position(posts, post):
+    """
+    Return the index of `post` within `posts`.
+    """
+    for index, item in enumerate(posts):
+        if item is post:
+            return index
+    raise ValueError('post not found')
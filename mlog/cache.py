@@ -0,0 +1,157 @@
+"""
+Persistent cache of parsed posts.
+"""
+
+import hashlib
+import pathlib
+import pickle
+import sqlite3
+import time
+
+from .config import blog_config as config
+from .constants import *  # noqa
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    post BLOB NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_path ON posts (path, namespace);
+"""
+
+
+def cache_namespace(*parts):
+    """
+    Return a digest of everything besides the source file
+    which affects how a post is parsed.
+    """
+    hash_ = hashlib.sha1()
+    for part in (VERSION,) + parts:
+        hash_.update(repr(part).encode('utf-8'))
+    return hash_.hexdigest()
+
+
+class PostCache:
+    """
+    An sqlite backed store mapping post files to parsed posts.
+
+    Posts are first looked up by path, mtime and size so an unchanged
+    file costs one stat and one query. Should that fail the file is
+    hashed and looked up by content, so touched but otherwise
+    unchanged files are still hits.
+
+    Once the stored posts exceed `max_size` bytes the least recently
+    used are evicted when the cache is closed.
+    """
+
+    def __init__(self, path, namespace='', max_size=config.CACHE_SIZE):
+        self.path = pathlib.Path(path)
+        self.namespace = namespace
+        self.max_size = max_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(SCHEMA)
+        self._accessed = []
+        self._pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _key(self, path, content):
+        hash_ = hashlib.sha1()
+        hash_.update(self.namespace.encode('utf-8'))
+        hash_.update(str(path).encode('utf-8'))
+        hash_.update(b'\0')
+        hash_.update(content)
+        return hash_.hexdigest()
+
+    def get(self, path):
+        """
+        Return the cached post for the file at `path` or `None`.
+        """
+        stat = pathlib.Path(path).stat()
+        row = self._db.execute(
+            'SELECT key, post FROM posts '
+            'WHERE path = ? AND namespace = ? AND mtime = ? AND size = ?',
+            (str(path), self.namespace, stat.st_mtime_ns,
+             stat.st_size)).fetchone()
+        if row is None:
+            key = self._key(path, pathlib.Path(path).read_bytes())
+            self._pending[str(path)] = (key, stat)
+            row = self._db.execute(
+                'SELECT key, post FROM posts WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                'UPDATE posts SET mtime = ?, size = ? WHERE key = ?',
+                (stat.st_mtime_ns, stat.st_size, key))
+        try:
+            post = pickle.loads(row[1])
+        except (pickle.UnpicklingError, AttributeError, ImportError):
+            # Stored by a version of mlog with a different post type.
+            return None
+        self._accessed.append(row[0])
+        return post
+
+    def put(self, path, post):
+        """
+        Store the parsed `post` for the file at `path`.
+        """
+        try:
+            key, stat = self._pending.pop(str(path))
+        except KeyError:
+            stat = pathlib.Path(path).stat()
+            key = self._key(path, pathlib.Path(path).read_bytes())
+        self._db.execute(
+            'DELETE FROM posts WHERE path = ? AND namespace = ?',
+            (str(path), self.namespace))
+        self._db.execute(
+            'INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (key, self.namespace, str(path), stat.st_mtime_ns,
+             stat.st_size, pickle.dumps(post, pickle.HIGHEST_PROTOCOL),
+             time.time()))
+
+    def size(self):
+        """
+        Return the total size in bytes of the stored posts.
+        """
+        return self._db.execute(
+            'SELECT COALESCE(SUM(LENGTH(post)), 0) FROM posts').fetchone()[0]
+
+    def evict(self):
+        """
+        Remove the least recently used posts until the cache
+        is no larger than `max_size`.
+        """
+        total = 0
+        evicted = []
+        rows = self._db.execute(
+            'SELECT key, LENGTH(post) FROM posts ORDER BY accessed DESC')
+        for key, size in rows:
+            total += size
+            if total > self.max_size:
+                evicted.append((key,))
+        self._db.executemany('DELETE FROM posts WHERE key = ?', evicted)
+
+    def close(self):
+        """
+        Record which posts were used, evict and commit.
+        """
+        now = time.time()
+        self._db.executemany(
+            'UPDATE posts SET accessed = ? WHERE key = ?',
+            [(now, key) for key in self._accessed])
+        self._accessed = []
+        self.evict()
+        self._db.commit()
+        self._db.close()
@@ -0,0 +1,76 @@
+"""
+Precompressed copies of output files.
+
+Web servers such as nginx with `gzip_static` serve a `.gz` sibling
+in place of the file itself, rather than compressing every response.
+"""
+
+import concurrent.futures
+import gzip
+import os
+import pathlib
+
+from .util import write_atomic
+
+
+SUFFIX = '.gz'
+
+
+def compress_file(path, level=9):
+    """
+    Write a gzipped copy of the file at `path` alongside it,
+    returning the size of the copy.
+    """
+    path = pathlib.Path(path)
+    # A fixed mtime keeps the copy of an unchanged file byte identical.
+    content = gzip.compress(path.read_bytes(), level, mtime=0)
+    write_atomic(path.with_name(path.name + SUFFIX), content)
+    return len(content)
+
+
+def compress_files(
+        directory,
+        uris,
+        previous=None,
+        min_size=1024,
+        extensions=('.html', '.css', '.js', '.xml', '.json'),
+        workers=None):
+    """
+    Compress the files `uris` within `directory` which have one of
+    `extensions` and are at least `min_size` bytes.
+
+    `previous` is the result of the last call, files whose mtime and
+    size are unchanged since then aren't compressed again. Returns
+    the uris which were compressed and a dict mapping every uri with
+    a compressed copy to its mtime, size and compressed size.
+    """
+    directory = pathlib.Path(directory)
+    previous = previous or {}
+    compressed = {}
+    pending = []
+    for uri in uris:
+        if not uri.endswith(tuple(extensions)):
+            continue
+        path = directory.joinpath(uri)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        if stat.st_size < min_size:
+            continue
+        entry = previous.get(uri)
+        if (entry is not None and
+                entry[:2] == [stat.st_mtime_ns, stat.st_size] and
+                path.with_name(path.name + SUFFIX).exists()):
+            compressed[uri] = entry
+        else:
+            pending.append((uri, path, stat))
+
+    # zlib releases the GIL, so threads compress in parallel.
+    with concurrent.futures.ThreadPoolExecutor(
+            workers or os.cpu_count() or 1) as executor:
+        sizes = executor.map(
+            lambda item: compress_file(item[1]), pending)
+        for (uri, _, stat), size in zip(pending, sizes):
+            compressed[uri] = [stat.st_mtime_ns, stat.st_size, size]
+    return sorted(uri for uri, _, _ in pending), compressed
@@ -7,6 +7,7 @@ import string
 
 __all__ = (
     'APPLICATION_NAME',
+    'VERSION',
     'TEMPLATE_DIR',
     'PAGE',
     'POST',
@@ -17,11 +18,18 @@ __all__ = (
     'IMAGE',
     'STYLE',
     'INDEX',
+    'FEED',
+    'SITEMAP',
+    'MANIFEST',
+    'POST_CACHE',
+    'TEMPLATE_CACHE',
+    'ASSET_CACHE',
     'SORT_ORDER')
 
 
 # Application constants.
 APPLICATION_NAME = 'mlog'
+VERSION = '0.0.0'
 TEMPLATE_DIR = 'templates'
 
 # URL segments for specific sections.
@@ -37,6 +45,20 @@ IMAGE = 'img'
 STYLE = 'css'
 
 INDEX = 'index.html'
+FEED = 'atom.xml'
+SITEMAP = 'sitemap.xml'
+
+# Name of the build manifest within the cache directory.
+MANIFEST = 'manifest.json'
+
+# Name of the parsed post cache within the cache directory.
+POST_CACHE = 'posts.sqlite3'
+
+# Name of the template bytecode cache within the cache directory.
+TEMPLATE_CACHE = 'templates'
+
+# Name of the built asset bundle cache within the cache directory.
+ASSET_CACHE = 'assets'
 
 # Sort order for pages and categories.
 SORT_ORDER = string.digits + string.ascii_lowercase
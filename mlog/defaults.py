@@ -6,7 +6,6 @@ Create you own config file to override these.
 
 
 import pathlib
-import pkg_resources
 
 from .constants import *  # noqa
 
@@ -14,9 +13,15 @@ from .constants import *  # noqa
 # Specifies to use the templates packaged with mlog.
 TEMPLATE_DIR = None
 
+# Cache compiled template bytecode between builds.
+TEMPLATE_BYTECODE_CACHE = True
+
+# Path to a zip of precompiled templates, created with
+# `python -m mlog --compile-templates`, to load templates from.
+TEMPLATE_BUNDLE = None
+
 # Base static directory.
-STATIC_DIR = pathlib.Path(
-    pkg_resources.resource_filename(APPLICATION_NAME, 'static'))
+STATIC_DIR = pathlib.Path(__file__).with_name('static')
 
 # CSS styles directory.
 STYLE_DIR = STATIC_DIR.joinpath('css')
@@ -27,9 +32,49 @@ SCRIPT_DIR = STATIC_DIR.joinpath('js')
 # Images directory.
 IMAGE_DIR = STATIC_DIR.joinpath('img')
 
+# Bundles of CSS or JS files concatenated into one file, with CSS
+# minified, under a fingerprinted name, linked with `asset_url(name)`. Sources
+# are relative to `STYLE_DIR` or `SCRIPT_DIR` by the bundle extension.
+ASSET_BUNDLES = {
+    'style.css': ('style.css', 'media-queries.css'),
+}
+
 # The amount of posts to display per page.
 POSTS_PER_PAGE = 5
 
+# Number list pages from the oldest posts, so adding a post only
+# changes the newest pages instead of every page.
+STABLE_PAGINATION = False
+
+# The amount of posts to include in each feed.
+FEED_ENTRIES = 20
+
+# Create XML sitemaps, optionally gzipped.
+SITEMAP = True
+SITEMAP_GZIP = False
+
+# Write a gzipped `.gz` copy alongside every output with one of
+# `PRECOMPRESS_EXTENSIONS` of at least `PRECOMPRESS_MIN_SIZE` bytes,
+# for web servers which serve precompressed files.
+PRECOMPRESS = False
+PRECOMPRESS_MIN_SIZE = 1024
+PRECOMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.xml', '.json')
+
+# The amount of converted post bodies to keep in memory.
+CONTENT_CACHE_SIZE = 256
+
+# Formats, besides ISO 8601, tried before falling back to dateutil
+# when parsing post dates. They should parse dates as dateutil does.
+DATE_FORMATS = (
+    '%Y/%m/%d',
+    '%Y/%m/%d %H:%M',
+    '%Y/%m/%d %H:%M:%S',
+    '%m/%d/%Y',
+    '%d %B %Y',
+    '%B %d, %Y',
+    '%b %d, %Y',
+)
+
 # The amount of character to use in the excerpt.
 EXCERPT_CHAR_COUNT = 200
 
@@ -39,12 +84,50 @@ POSTS_DIR = pathlib.Path('posts')
 # Assume pages to be in the CWD.
 PAGES_DIR = pathlib.Path('pages')
 
+# Number of processes used to parse posts and pages,
+# `None` uses one process per CPU.
+LOAD_WORKERS = 1
+
+# Number of processes used to render pages,
+# `None` uses one process per CPU.
+RENDER_WORKERS = 1
+
+# Number of threads used to write the rendered site to disk.
+FLUSH_WORKERS = 8
+
+# Number of rendered files which may wait to be written before
+# rendering pauses for the writer threads to catch up.
+WRITE_QUEUE_SIZE = 64
+
 # Output directory for compiled html files.
 OUTPUT_DIR = pathlib.Path('html')
 
+# Directory for files persisted between builds.
+CACHE_DIR = pathlib.Path('.mlog-cache')
+
+# Cache parsed posts between builds.
+USE_CACHE = True
+
+# Maximum size in bytes of the parsed post cache.
+CACHE_SIZE = 256 * 1024 * 1024
+
+# Only re-render outputs whose inputs changed since the last build.
+INCREMENTAL = False
+
+# Seconds between the development server's checks for changed files.
+SERVER_POLL_INTERVAL = 0.5
+
 # The public url of the site
 BASE_URL = 'http://zyppa.com:8000/'
 
+# Custom paths for url sections, mapping a section to its path with
+# a `{slug}` placeholder for the rest of the url, for example
+# {'post': 'blog/{slug}', 'tag': 'topics/{slug}'}.
+URLS = {}
+
 # Meta information for the blog.
 TITLE = 'mlog static blog platform'
 DESCRIPTION = 'mlog static blog platform for python'
+
+# The author of the Atom feeds, the blog title when `None`.
+AUTHOR = None
@@ -0,0 +1,72 @@
+"""
+Atom feed writer.
+"""
+
+import datetime
+
+
+ATOM_NAMESPACE = 'http://www.w3.org/2005/Atom'
+
+
+def format_date(date):
+    """
+    Return an RFC 3339 date, naive dates are assumed to be UTC.
+    """
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date.isoformat()
+
+
+def _element(xml, name, text=None, **attrs):
+    xml.startElement(name, attrs)
+    if text is not None:
+        xml.characters(text)
+    xml.endElement(name)
+
+
+def _author(xml, name):
+    xml.startElement('author', {})
+    _element(xml, 'name', name)
+    xml.endElement('author')
+
+
+def write_atom(fh, title, feed_url, site_url, posts, post_url, author):
+    """
+    Write an Atom feed of `posts` by `author` to the binary file `fh`.
+
+    `post_url` returns the url for a given post.
+    """
+    # Imported here as saxutils pulls in urllib.request.
+    from xml.sax.saxutils import XMLGenerator
+
+    xml = XMLGenerator(fh, 'utf-8', short_empty_elements=True)
+    xml.startDocument()
+    xml.startElement('feed', {'xmlns': ATOM_NAMESPACE})
+    _element(xml, 'title', title)
+    _element(xml, 'id', feed_url)
+    _element(xml, 'link', rel='self', href=feed_url)
+    _element(xml, 'link', rel='alternate', href=site_url)
+    # Entries without an author of their own inherit this one.
+    _author(xml, author)
+    if posts:
+        _element(xml, 'updated', format_date(posts[0]['date']))
+    xml.ignorableWhitespace('\n')
+
+    for post in posts:
+        url = post_url(post)
+        xml.startElement('entry', {})
+        _element(xml, 'title', post['title'])
+        _element(xml, 'id', url)
+        _element(xml, 'link', rel='alternate', href=url)
+        _element(xml, 'updated', format_date(post['date']))
+        if post['author']:
+            _author(xml, post['author'])
+        for category in post['categories']:
+            _element(xml, 'category', term=category)
+        _element(xml, 'summary', post['description'], type='html')
+        _element(xml, 'content', post['content'], type='html')
+        xml.endElement('entry')
+        xml.ignorableWhitespace('\n')
+
+    xml.endElement('feed')
+    xml.endDocument()
@@ -1,3 +1,6 @@
+import hashlib
+import pathlib
+
 import jinja2
 
 
@@ -5,6 +8,73 @@ from .config import blog_config as config
 from .constants import *  # noqa
 
 
+class BytecodeCache(jinja2.FileSystemBytecodeCache):
+    """
+    A filesystem bytecode cache which creates its directory
+    the first time a template is compiled.
+    """
+
+    def dump_bytecode(self, bucket):
+        pathlib.Path(self.directory).mkdir(parents=True, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def create_env(
+        loader,
+        bundle=config.TEMPLATE_BUNDLE,
+        bytecode_cache=config.TEMPLATE_BYTECODE_CACHE):
+    """
+    Create the template environment.
+
+    If a precompiled `bundle` exists templates are loaded from it,
+    otherwise they are compiled from `loader` and optionally cached
+    as bytecode within the cache directory.
+    """
+    if bundle is not None and pathlib.Path(bundle).exists():
+        return jinja2.Environment(loader=jinja2.ModuleLoader(str(bundle)))
+    cache = None
+    if bytecode_cache:
+        cache = BytecodeCache(str(config.CACHE_DIR.joinpath(TEMPLATE_CACHE)))
+    return jinja2.Environment(loader=loader, bytecode_cache=cache)
+
+
+def compile_templates(target, loader=None):
+    """
+    Precompile every template into a zip file at `target`
+    which can be used as the `TEMPLATE_BUNDLE`.
+    """
+    loader = loader or template_loader
+    pathlib.Path(target).parent.mkdir(parents=True, exist_ok=True)
+    jinja2.Environment(loader=loader).compile_templates(
+        str(target), zip='deflated', ignore_errors=False)
+
+
+def template_sources(env):
+    """
+    Return the name and source of every template in `env`.
+
+    A precompiled bundle can't list its templates, so the path
+    and a digest of the bundle are returned for it instead.
+    """
+    if isinstance(env.loader, jinja2.ModuleLoader):
+        return [
+            (path, _bundle_digest(path))
+            for path in env.loader.module.__path__]
+    return [
+        (name, env.loader.get_source(env, name)[0])
+        for name in env.list_templates()]
+
+
+def _bundle_digest(path):
+    path = pathlib.Path(path)
+    paths = sorted(path.glob('**/*')) if path.is_dir() else [path]
+    hash_ = hashlib.sha1()
+    for path in paths:
+        if path.is_file():
+            hash_.update(path.read_bytes())
+    return hash_.hexdigest()
+
+
 template_loader = jinja2.PackageLoader(
     APPLICATION_NAME,
     TEMPLATE_DIR)
@@ -12,7 +82,7 @@ if config.TEMPLATE_DIR is not None:
     template_loader = jinja2.ChoiceLoader([
         jinja2.FileSystemLoader(config.TEMPLATE_DIR),
         template_loader])
-env = jinja2.Environment(loader=template_loader)
+env = create_env(template_loader)
 
 
 def jinja_template_writer(template, content, fh):
@@ -23,3 +93,45 @@ def jinja_template_writer(template, content, fh):
     template = env.get_template(template)
     template_stream = template.stream(content=content)
     template_stream.dump(fh)
+
+
+class FragmentCache:
+    """
+    Renders templates to strings, reusing the rendered output
+    for as long as the template and its dependencies are unchanged.
+
+    Each fragment occupies a slot named by `key`. Dependencies are
+    compared by identity, so callers must pass objects which are
+    replaced rather than mutated when they change.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self._fragments = {}
+
+    def render(self, name, key=None, depends=(), **context):
+        """
+        Return the rendered template `name`.
+        """
+        key = (name, key)
+        template = self.env.get_template(name)
+        try:
+            cached_template, cached_depends, html = self._fragments[key]
+        except KeyError:
+            pass
+        else:
+            if cached_template is template and all(
+                    a is b for a, b in zip(cached_depends, depends)):
+                return html
+        html = template.render(**context)
+        self._fragments[key] = (template, tuple(depends), html)
+        return html
+
+    def discard(self, name, key=None):
+        """
+        Forget the fragment `name` in the slot `key`, if any.
+        """
+        self._fragments.pop((name, key), None)
+
+    def clear(self):
+        self._fragments.clear()
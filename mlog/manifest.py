@@ -0,0 +1,144 @@
+"""
+Build manifest used for incremental builds.
+
+The manifest records a fingerprint for every source file read and,
+for every output file written, a digest of all the inputs it was
+rendered from along with the sources it depends on and a fingerprint
+of the file itself.
+"""
+
+import hashlib
+import json
+import pathlib
+
+from .util import write_atomic
+
+
+MANIFEST_VERSION = 1
+
+
+def digest(*parts):
+    """
+    Return a hex digest of the given string parts.
+    """
+    hash_ = hashlib.sha1()
+    for part in parts:
+        hash_.update(str(part).encode('utf-8'))
+        hash_.update(b'\0')
+    return hash_.hexdigest()
+
+
+def file_digest(path):
+    """
+    Return a hex digest of the contents of the file at `path`.
+    """
+    hash_ = hashlib.sha1()
+    with pathlib.Path(path).open('rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+
+class Manifest:
+    """
+    A persistent record of build inputs and outputs.
+
+    The manifest from the previous build is kept separately from
+    the one being recorded so each output can be compared with the
+    inputs it was last built from.
+
+    `files` maps each file in the output directory to the mtime,
+    size and digest it had when last written, and `compressed`
+    maps each file with a compressed copy to the mtime and size it
+    had when compressed and the size of the copy.
+    """
+
+    def __init__(self, path, previous=None):
+        self.path = pathlib.Path(path)
+        previous = previous or {}
+        self._previous_sources = previous.get('sources', {})
+        self._previous_outputs = previous.get('outputs', {})
+        self._sources = {}
+        self._outputs = {}
+        self.files = previous.get('files', {})
+        self.compressed = previous.get('compressed', {})
+
+    @classmethod
+    def load(cls, path):
+        """
+        Alternate init method which loads the manifest
+        from a previous build if there is one.
+        """
+        path = pathlib.Path(path)
+        previous = None
+        try:
+            with path.open() as fh:
+                previous = json.load(fh)
+        except (OSError, ValueError):
+            pass
+        if previous and previous.get('version') != MANIFEST_VERSION:
+            previous = None
+        return cls(path, previous)
+
+    def source_digest(self, path):
+        """
+        Return a fingerprint for the source file at `path`.
+
+        The file is only hashed when its mtime or size differ
+        from the previous build.
+        """
+        key = str(path)
+        if key in self._sources:
+            return self._sources[key][2]
+        stat = pathlib.Path(path).stat()
+        previous = self._previous_sources.get(key)
+        if previous is not None and previous[:2] == [
+                stat.st_mtime_ns, stat.st_size]:
+            hex_ = previous[2]
+        else:
+            hex_ = file_digest(path)
+        self._sources[key] = [stat.st_mtime_ns, stat.st_size, hex_]
+        return hex_
+
+    def is_stale(self, output, output_digest):
+        """
+        Return `True` if `output` was not built from the same
+        inputs during the previous build.
+        """
+        previous = self._previous_outputs.get(str(output))
+        return previous is None or previous[0] != output_digest
+
+    def record(self, output, output_digest, sources=()):
+        """
+        Record that `output` was built from `sources`.
+        """
+        self._outputs[str(output)] = [output_digest, sorted(sources)]
+
+    def dependants(self, source):
+        """
+        Return the outputs recorded as depending on `source`.
+        """
+        source = str(source)
+        return sorted(
+            output
+            for output, (_, sources) in self._outputs.items()
+            if source in sources)
+
+    def outputs(self):
+        """
+        Return the outputs recorded during this build.
+        """
+        return list(self._outputs)
+
+    def save(self):
+        """
+        Write the manifest to disk.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, json.dumps({
+            'version': MANIFEST_VERSION,
+            'sources': self._sources,
+            'outputs': self._outputs,
+            'files': self.files,
+            'compressed': self.compressed,
+        }).encode('utf-8'))
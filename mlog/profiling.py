@@ -0,0 +1,257 @@
+"""
+Build profiling.
+
+A `Profiler` times the phases of a build, the methods of the blog
+and renderer it instruments, along with every rendered output, and
+counts the files and bytes written.
+"""
+
+import collections
+import contextlib
+import cProfile
+import functools
+import json
+import pathlib
+import time
+
+
+class Profiler:
+    """
+    Collects timings for a build and reports them.
+
+    Phase timings are inclusive, a phase which calls another
+    includes its time. The renderer's `_create_*` methods queue render
+    jobs, rendering them is timed by `_render_jobs`.
+    """
+
+    def __init__(self):
+        # name -> [calls, seconds]
+        self.phases = collections.OrderedDict()
+        # uri -> (template, seconds, bytes)
+        self.outputs = {}
+        # slug -> seconds to convert
+        self.posts = {}
+        self.files_written = 0
+        self.bytes_written = 0
+        self.files_compressed = 0
+        self.bytes_compressed = 0
+        self.compressed_size = 0
+        self.total = 0.0
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Time the body of the with statement as phase `name`.
+        """
+        stats = self.phases.setdefault(name, [0, 0.0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats[0] += 1
+            stats[1] += time.perf_counter() - start
+
+    def instrument(self, obj, *names):
+        """
+        Time every call to the methods `names` of `obj` as a phase
+        named after the method.
+        """
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self._timed(
+                '{0}.{1}'.format(type(obj).__name__, name), method))
+
+    def _timed(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            with self.phase(name):
+                return method(*args, **kwargs)
+        return timed
+
+    @contextlib.contextmanager
+    def markdown(self, posts):
+        """
+        Time the markdown conversions of `posts` as they happen
+        within the with statement, conversions in forked render
+        workers aren't seen.
+        """
+        from . import util
+
+        slugs = {post['body']: post['slug'] for post in posts}
+        # Import markdown and load its extensions up front so the
+        # first post converted isn't charged for them.
+        util._markdown(*util.BODY_EXTENSIONS)
+        convert = util._convert_markdown
+
+        def timed(text):
+            start = time.perf_counter()
+            with self.phase('markdown'):
+                html = convert(text)
+            slug = slugs.get(text)
+            if slug is not None:
+                self.posts[slug] = (
+                    self.posts.get(slug, 0.0) + time.perf_counter() - start)
+            return html
+
+        # Cached conversions would go untimed.
+        util._cached_convert.cache_clear()
+        util._convert_markdown = timed
+        try:
+            yield
+        finally:
+            util._convert_markdown = convert
+
+    def record_output(self, uri, template, seconds, size):
+        """
+        Record that rendering `template` to `uri` took `seconds`
+        and produced `size` bytes.
+        """
+        self.outputs[uri] = (template, seconds, size)
+
+    def record_written(self, files, size):
+        """
+        Record that `files` files of `size` bytes were written.
+        """
+        self.files_written += files
+        self.bytes_written += size
+
+    def record_compressed(self, files, size, compressed_size):
+        """
+        Record that `files` files of `size` bytes were compressed
+        to `compressed_size` bytes.
+        """
+        self.files_compressed += files
+        self.bytes_compressed += size
+        self.compressed_size += compressed_size
+
+    @contextlib.contextmanager
+    def run(self, stats_file=None):
+        """
+        Time the whole build, additionally running it under cProfile
+        and dumping the stats to `stats_file` if given.
+        """
+        profile = cProfile.Profile() if stats_file else None
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(str(stats_file))
+            self.total += time.perf_counter() - start
+
+    def templates(self):
+        """
+        Return (template, renders, seconds) for each template,
+        slowest first.
+        """
+        totals = collections.defaultdict(lambda: [0, 0.0])
+        for template, seconds, _ in self.outputs.values():
+            totals[template][0] += 1
+            totals[template][1] += seconds
+        return sorted(
+            ((template, count, seconds)
+             for template, (count, seconds) in totals.items()),
+            key=lambda row: row[2],
+            reverse=True)
+
+    def slowest_posts(self, count=10):
+        """
+        Return the `count` slowest (slug, seconds) posts to convert.
+        """
+        return sorted(
+            self.posts.items(),
+            key=lambda row: row[1],
+            reverse=True)[:count]
+
+    def slowest_outputs(self, count=10):
+        """
+        Return the `count` slowest (uri, seconds) outputs to render.
+        """
+        return sorted(
+            ((uri, seconds) for uri, (_, seconds, _) in self.outputs.items()),
+            key=lambda row: row[1],
+            reverse=True)[:count]
+
+    def as_dict(self, count=10):
+        """
+        Return the report as a dict suitable for json.
+        """
+        return {
+            'total': self.total,
+            'phases': {
+                name: {'calls': calls, 'seconds': seconds}
+                for name, (calls, seconds) in self.phases.items()},
+            'rendered': {
+                'files': len(self.outputs),
+                'bytes': sum(size for _, _, size in self.outputs.values()),
+            },
+            'written': {
+                'files': self.files_written,
+                'bytes': self.bytes_written,
+            },
+            'compressed': {
+                'files': self.files_compressed,
+                'bytes': self.bytes_compressed,
+                'compressed_bytes': self.compressed_size,
+            },
+            'templates': {
+                template: {'renders': renders, 'seconds': seconds}
+                for template, renders, seconds in self.templates()},
+            'slowest_posts': self.slowest_posts(count),
+            'slowest_outputs': self.slowest_outputs(count),
+        }
+
+    def dump(self, path):
+        """
+        Write the report as json to `path`.
+        """
+        with pathlib.Path(path).open('w') as fh:
+            json.dump(self.as_dict(), fh, indent=2)
+
+    def summary(self, count=10):
+        """
+        Return a plain text summary table of the report.
+        """
+        report = self.as_dict(count)
+        lines = []
+
+        def table(title, rows):
+            lines.extend(['', title])
+            for label, calls, seconds in rows:
+                lines.append('  {0:<48} {1:>7} {2:>10.1f}ms'.format(
+                    label, calls, seconds * 1000))
+
+        table('Phases', [
+            (name, phase['calls'], phase['seconds'])
+            for name, phase in report['phases'].items()])
+        if any('._create_' in name for name in report['phases']):
+            lines.append(
+                '  (_create_* phases queue render jobs, '
+                'rendering them is under _render_jobs)')
+        table('Templates', [
+            (template, stats['renders'], stats['seconds'])
+            for template, stats in report['templates'].items()])
+        table('Slowest posts', [
+            (slug, '', seconds) for slug, seconds in report['slowest_posts']])
+        table('Slowest outputs', [
+            (uri, '', seconds) for uri, seconds in report['slowest_outputs']])
+        lines.extend([
+            '',
+            'Rendered {0} files, {1} bytes'.format(
+                report['rendered']['files'], report['rendered']['bytes']),
+            'Wrote {0} files, {1} bytes'.format(
+                report['written']['files'], report['written']['bytes']),
+        ])
+        compressed = report['compressed']
+        if compressed['files']:
+            lines.append(
+                'Compressed {0} files, {1} bytes to {2} ({3:.1%})'.format(
+                    compressed['files'],
+                    compressed['bytes'],
+                    compressed['compressed_bytes'],
+                    compressed['compressed_bytes'] / compressed['bytes']))
+        lines.append('Total {0:.1f}ms'.format(report['total'] * 1000))
+        return '\n'.join(lines).lstrip('\n')
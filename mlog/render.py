@@ -1,42 +1,34 @@
 from contextlib import closing
-import functools
+import concurrent.futures
+import datetime
+import io
+import itertools
+import multiprocessing
+import os
 import pathlib
-import shutil
+import time
 
 from .config import blog_config as config
 from .constants import *  # noqa
+from . import assets
+from . import compress
+from . import feed
 from . import jinja
+from . import manifest
+from . import site
+from . import sitemap
 from . import util
 
 
-def create_output_structure(
-        base=config.OUTPUT_DIR,
-        script=config.SCRIPT_DIR,
-        css=config.STYLE_DIR,
-        img=config.IMAGE_DIR):
-    """
-    Create all the output directories needed
-    for the blog and copies over any static files.
-
-    WARNING: This will unlink all directories if
-    they currently exists.
-    """
-
-    shutil.rmtree(str(base), ignore_errors=True)
-    base = pathlib.Path(base)
-    base.mkdir()
-
-    output_static = base.joinpath(STATIC)
-    output_static.mkdir()
+# The renderer and jobs inherited by forked render workers.
+_worker_renderer = None
+_worker_jobs = None
 
-    output_css = output_static.joinpath(STYLE)
-    shutil.copytree(str(css), str(output_css))
 
-    output_script = output_static.joinpath(SCRIPT)
-    shutil.copytree(str(script), str(output_script))
-
-    output_img = output_static.joinpath(IMAGE)
-    shutil.copytree(str(img), str(output_img))
+def _render_job_chunk(indices):
+    return [
+        _worker_renderer._render_job(_worker_jobs[index])
+        for index in indices]
 
 
 class _Renderer:
@@ -90,19 +82,54 @@ class Renderer:
             blog,
             posts_per_page=config.POSTS_PER_PAGE,
             output_dir=config.OUTPUT_DIR,
-            template_env=jinja.env):
+            template_env=jinja.env,
+            incremental=config.INCREMENTAL,
+            manifest_file=config.CACHE_DIR.joinpath(MANIFEST),
+            asset_cache_dir=config.CACHE_DIR.joinpath(ASSET_CACHE),
+            render_workers=config.RENDER_WORKERS,
+            flush_workers=config.FLUSH_WORKERS,
+            write_queue_size=config.WRITE_QUEUE_SIZE,
+            feed_entries=config.FEED_ENTRIES,
+            sitemap=config.SITEMAP,
+            precompress=config.PRECOMPRESS,
+            stable_pagination=config.STABLE_PAGINATION,
+            profiler=None):
 
         self.blog = blog
+        self.urls = util.site_urls()
         self.posts_per_page = posts_per_page
-        self.output_dir = output_dir
+        self.output_dir = pathlib.Path(output_dir)
         self.template_env = template_env
+        self.fragments = jinja.FragmentCache(template_env)
         self.template_env.globals.update(self.template_env_globals)
+        self.incremental = incremental
+        self.manifest_file = manifest_file
+        self.manifest = None
+        self.asset_cache_dir = asset_cache_dir
+        self.assets = {}
+        self._asset_uris = ()
+        self.render_workers = render_workers
+        self.flush_workers = flush_workers
+        self.write_queue_size = write_queue_size
+        self.feed_entries = feed_entries
+        self.sitemap = sitemap
+        self.precompress = precompress
+        self.stable_pagination = stable_pagination
+        self.profiler = profiler
+        self.site = None
+        self._writing = False
+        self._writer = None
+        self._planning = False
+        self._build_digest = None
+        self._jobs = []
 
     @property
     def template_env_globals(self):
         return {
             'category_menu': self._create_category_menu,
             'page_menu': self._create_page_menu,
+            'fragment': self._create_fragment,
+            'post_snippet': self._create_post_snippet,
             'site_url': config.BASE_URL,
             'site_description': self.blog.description,
             'site_title': self.blog.title,
@@ -112,73 +139,422 @@ class Renderer:
             'TAG': TAG,
             'STATIC': STATIC,
             'STYLE': STYLE,
+            'FEED': FEED,
             'excerpt': util.generate_excerpt,
-            'make_site_url': functools.partial(util.make_url, config.BASE_URL),
+            'make_site_url': self.urls,
+            'asset_url': self._asset_url,
         }
 
-    def render_to_files(self):
+    def render_to_site(self):
+        """
+        Render the blog and its static files into a `Site`
+        held in memory, without touching the output directory.
+        """
+        self.manifest = manifest.Manifest.load(self.manifest_file)
+        self._render()
+        if self.sitemap:
+            self._create_sitemaps()
+        return self.site
+
+    def render_to_files(self, archive=None):
         """
         Create a deployable blog of static html pages.
+
+        Files whose content is unchanged are left untouched and
+        files which are no longer part of the blog are removed.
+        When rendering incrementally only outputs whose inputs
+        changed since the previous build are rendered at all.
+        If `archive` is given the whole site is rendered, even
+        when rendering incrementally, and also written to that
+        tar or zip file.
+        """
+        if archive is not None and self.incremental:
+            self.incremental = False
+            try:
+                return self.render_to_files(archive)
+            finally:
+                self.incremental = True
+
+        self.manifest = manifest.Manifest.load(self.manifest_file)
+        written = self._write_files(self._render)
+        if self.sitemap:
+            # Sitemaps use the mtimes of the pages just written.
+            written += self._write_files(self._create_sitemaps)
+        if self.profiler is not None:
+            self.profiler.record_written(
+                len(written),
+                sum(len(self.site[uri]) for uri in written))
+        if archive is not None:
+            self.site.archive(archive)
+        if self.precompress:
+            self._compress_files()
+        else:
+            self.manifest.compressed = {}
+        self._remove_stale_files()
+        self.manifest.save()
+
+    def plan(self):
+        """
+        Return a dict mapping the uri of every output to the job
+        which renders it, without rendering anything.
+
+        The sources of each output are recorded in a new `manifest`
+        which isn't saved, so the outputs a source change affects
+        can be found with `Manifest.dependants`.
+        """
+        self.manifest = manifest.Manifest(self.manifest_file)
+        self._create_assets()
+        self._planning = True
+        try:
+            self._queue_outputs()
+        finally:
+            self._planning = False
+        jobs, self._jobs = self._jobs, []
+        return {
+            output_file.relative_to(self.output_dir).as_posix(): (
+                template, output_file, context)
+            for template, output_file, context in jobs}
+
+    def render_job(self, job):
+        """
+        Render a job returned from `plan` to bytes.
+
+        Feeds are rendered into memory like any other page, so they
+        go through the `Site` and the writer.
+        """
+        template, _, context = job
+        if template == FEED:
+            fh = io.BytesIO()
+            feed.write_atom(
+                fh,
+                post_url=lambda post: self.urls(POST, post['slug']),
+                **context)
+            return fh.getvalue()
+        return self.template_env.get_template(template).render(
+            **context).encode('utf-8')
+
+    def _queue_outputs(self):
+        """
+        Queue a job for every output of the blog.
         """
-        create_output_structure()
         self._create_post_pages()
         self._create_page_pages()
         self._create_tag_pages()
         self._create_category_pages()
+        self._create_feeds()
+
+    def _create_build_digest(self):
+        """
+        Return a digest of the inputs shared by every output;
+        the config, templates and site menus.
+        """
+        return manifest.digest(
+            sorted((key, repr(value)) for key, value in config.items()),
+            jinja.template_sources(self.template_env),
+            self.output_dir,
+            self.posts_per_page,
+            self.blog.title,
+            self.blog.description,
+            self._asset_uris,
+            self._create_page_menu(),
+            self._create_category_menu())
+
+    def _write(self, template, output_file, sources=(), extra=(), **context):
+        """
+        Queue `template` to be rendered with `context` to `output_file`.
+
+        `sources` are the files the output depends on, the output
+        is skipped during incremental builds if neither they nor
+        `extra` changed since the previous build.
+        """
+        if (self._record(output_file, sources, template, *extra) or
+                not self.incremental):
+            self._jobs.append((template, output_file, context))
+
+    def _record(self, output_file, sources, *extra):
+        """
+        Record `output_file` and the inputs it is built from in the
+        manifest, returning `True` if it is stale and needs writing.
+        """
+        sources = [str(source) for source in sources if source is not None]
+        output = output_file.relative_to(self.output_dir).as_posix()
+        if self._planning:
+            # Nothing is skipped, only the sources are of interest.
+            self.manifest.record(output, '', sources)
+            return True
+        output_digest = manifest.digest(
+            self._build_digest,
+            *extra,
+            *[self.manifest.source_digest(source) for source in sources])
+        self.manifest.record(output, output_digest, sources)
+        return (
+            not output_file.exists() or
+            self.manifest.is_stale(output, output_digest))
+
+    def _render_job(self, job):
+        """
+        Render a queued template returning its uri, content
+        and the seconds it took to render.
+        """
+        template, output_file, context = job
+        start = time.perf_counter()
+        content = self.render_job(job)
+        return (
+            output_file.relative_to(self.output_dir).as_posix(),
+            content,
+            time.perf_counter() - start)
+
+    def _render(self):
+        self.site = site.Site()
+        self._create_assets()
+        self._build_digest = self._create_build_digest()
+        self._queue_outputs()
+        # Posts appear in many outputs but are converted once each,
+        # forked render workers each keep their own conversions.
+        with util.render_pass():
+            self._render_jobs()
+        self._create_static_files()
+
+    def _write_files(self, create):
+        """
+        Call `create`, writing the files it adds to the site from a
+        pool of threads as they're added. Returns the urls written.
+        """
+        self._writing = True
+        try:
+            create()
+        finally:
+            self._writing = False
+            writer, self._writer = self._writer, None
+            written = [] if writer is None else writer.close()
+        return written
+
+    def _post(self, content, uri):
+        """
+        Add a file to the site, and queue it to be written
+        when rendering to files.
+        """
+        self.site.post(content, uri)
+        if not self._writing:
+            return
+        if self._writer is None:
+            # Started with the first file rather than up front, so
+            # render workers are never forked while threads run.
+            self._writer = site.Writer(
+                self.output_dir,
+                self.flush_workers,
+                self.manifest.files,
+                self.write_queue_size)
+        self._writer.write(uri, content)
+
+    def _add_rendered(self, job, uri, content, seconds):
+        self._post(content, uri)
+        if self.profiler is not None:
+            self.profiler.record_output(uri, job[0], seconds, len(content))
+
+    def _render_jobs(self):
+        """
+        Render all the queued templates.
+
+        With more than one render worker the jobs are split into
+        contiguous chunks and rendered in forked processes which
+        share this renderer, its blog and compiled templates.
+        """
+        jobs, self._jobs = self._jobs, []
+        workers = self.render_workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        # Never fork while writer threads are running.
+        if (workers <= 1 or len(jobs) <= 1 or self._writer is not None or
+                'fork' not in multiprocessing.get_all_start_methods()):
+            for job in jobs:
+                self._add_rendered(job, *self._render_job(job))
+            return
+
+        # Compile every template before forking so workers share them.
+        for template in {job[0] for job in jobs} - {FEED}:
+            self.template_env.get_template(template)
+
+        global _worker_renderer, _worker_jobs
+        _worker_renderer, _worker_jobs = self, jobs
+        chunksize = max(1, len(jobs) // (workers * 4))
+        chunks = [
+            range(start, min(start + chunksize, len(jobs)))
+            for start in range(0, len(jobs), chunksize)]
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('fork')) as pool:
+                # Every worker is forked as the chunks are submitted,
+                # before the first result starts the writer threads.
+                rendered = itertools.chain.from_iterable(
+                    pool.map(_render_job_chunk, chunks))
+                for job, result in zip(jobs, rendered):
+                    self._add_rendered(job, *result)
+        finally:
+            _worker_renderer, _worker_jobs = None, None
+
+    def _create_assets(self):
+        """
+        Build the asset bundles, reusing cached bundles
+        whose sources are unchanged.
+        """
+        self.assets = assets.build_bundles(
+            config.ASSET_BUNDLES,
+            {STYLE: config.STYLE_DIR, SCRIPT: config.SCRIPT_DIR},
+            self.asset_cache_dir)
+        uris = tuple(sorted(asset.uri for asset in self.assets.values()))
+        # Replaced only on change as fragments compare it by identity.
+        if uris != self._asset_uris:
+            self._asset_uris = uris
+
+    def _asset_url(self, name):
+        """
+        Return the url of the asset bundle `name`, or of the
+        file at the path `name` within the static directory.
+        """
+        asset = self.assets.get(name)
+        if asset is None:
+            return self.urls(STATIC, *name.split('/'))
+        return self.urls(*asset.uri.split('/'))
+
+    def _create_static_files(self):
+        """
+        Add the static files and asset bundles to the site.
+        """
+        for asset in self.assets.values():
+            self._post(asset.content, asset.uri)
+        static_dirs = (
+            (STYLE, config.STYLE_DIR),
+            (SCRIPT, config.SCRIPT_DIR),
+            (IMAGE, config.IMAGE_DIR))
+        for section, static_dir in static_dirs:
+            static_dir = pathlib.Path(static_dir)
+            for path in sorted(static_dir.glob('**/*')):
+                if path.is_file():
+                    uri = pathlib.PurePosixPath(
+                        STATIC, section, path.relative_to(static_dir))
+                    self._post(path.read_bytes(), str(uri))
+
+    def _compress_files(self):
+        """
+        Write gzipped copies of the outputs, skipping those
+        unchanged since they were last compressed.
+        """
+        compressed, self.manifest.compressed = compress.compress_files(
+            self.output_dir,
+            set(self.manifest.outputs()).union(
+                uri for uri, _ in self.site.items()),
+            self.manifest.compressed,
+            config.PRECOMPRESS_MIN_SIZE,
+            config.PRECOMPRESS_EXTENSIONS)
+        if self.profiler is not None:
+            self.profiler.record_compressed(
+                len(compressed),
+                sum(self.manifest.compressed[uri][1] for uri in compressed),
+                sum(self.manifest.compressed[uri][2] for uri in compressed))
+
+    def _remove_stale_files(self):
+        """
+        Remove files from the output directory which are neither
+        part of the site nor unchanged outputs of this build,
+        along with any emptied directories. Hidden files and
+        directories are left alone.
+        """
+        expected = set(self.manifest.outputs())
+        expected.update(
+            uri + compress.SUFFIX for uri in self.manifest.compressed)
+        for root, dirs, files in os.walk(str(self.output_dir), False):
+            root = pathlib.Path(root)
+            if any(part.startswith('.') for part in
+                   root.relative_to(self.output_dir).parts):
+                continue
+            for name in files:
+                uri = root.joinpath(name).relative_to(
+                    self.output_dir).as_posix()
+                if (uri not in expected and uri not in self.site and
+                        not name.startswith('.')):
+                    root.joinpath(name).unlink()
+                    self.manifest.files.pop(uri, None)
+            if root != self.output_dir:
+                try:
+                    root.rmdir()
+                except OSError:
+                    pass
 
     def _create_post_list(self, posts, sections=()):
         """
         Creates a stream of blog post snippets.
         """
-        template = self.template_env.get_template('post_list.html')
-        pager = util.Pager(posts, self.posts_per_page)
-
-        for index in range(pager.page_count):
-            context = pager.page_context(index)
-            template_stream = template.stream(
+        pager = util.Pager(
+            posts,
+            self.posts_per_page,
+            self.stable_pagination)
+
+        for context in pager:
+            self._write(
+                'post_list.html',
+                self.output_dir.joinpath(
+                    self.urls.path(*sections, context['file_name'])),
+                sources=[post.get('path') for post in context['items']],
+                extra=[
+                    sections,
+                    context['file_name'],
+                    context['next'],
+                    context['prev']],
                 context=context,
                 sections=sections)
 
-            output_file = self.output_dir.joinpath(
-                *sections, context['file_name'])
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-
-            with output_file.open('w') as fh:
-                template_stream.dump(fh)
-
     def _create_post_page(self, post):
         """
         Write a rendered blog post template.
         """
-        template = self.template_env.get_template('post.html')
-        template_stream = template.stream(post=post)
-        output_file = self.output_dir.joinpath(POST, post['slug'])
-        if not output_file.parent.exists():
-            output_file.parent.mkdir(parents=True)
-        with output_file.open('w') as fh:
-            template_stream.dump(fh)
+        self._write(
+            'post.html',
+            self.output_dir.joinpath(self.urls.path(POST, post['slug'])),
+            sources=[post.get('path')],
+            post=post)
 
     def _create_page_page(self, page):
         """
         Write a rendered page.
         """
-        template = self.template_env.get_template('page.html')
-        template_stream = template.stream(page=page)
-        output_file = self.output_dir.joinpath(PAGE, page['slug'])
-        if not output_file.parent.exists():
-            output_file.parent.mkdir(parents=True)
-        with output_file.open('w') as fh:
-            template_stream.dump(fh)
+        self._write(
+            'page.html',
+            self.output_dir.joinpath(self.urls.path(PAGE, page['slug'])),
+            sources=[page.get('path')],
+            page=page)
 
     def _create_page_menu(self):
         """
         Return a list of two tuples containing the page_menu item
         and slug for the page.
         """
-        return list(sorted([
-            (page['menu_name'], page['slug'])
-            for page in self.blog.pages],
-            key=lambda page: SORT_ORDER.find(page[0][0].lower())))
+        return self.blog.page_menu
+
+    def _create_fragment(self, name):
+        """
+        Render site chrome shared by every page, such as the menus,
+        once and reuse it until the pages, categories or asset
+        bundles change.
+        """
+        return self.fragments.render(
+            name,
+            depends=(
+                self.blog.page_menu,
+                self.blog.category_menu,
+                self._asset_uris))
+
+    def _create_post_snippet(self, post):
+        """
+        Render a post's entry in a post list once for all the
+        list pages it appears on.
+        """
+        return self.fragments.render(
+            'post_snippet.html',
+            key=post['slug'],
+            depends=(post,),
+            post=post)
 
     def _create_post_pages(self):
         """
@@ -199,11 +575,7 @@ class Renderer:
         """
         Create the category pages.
         """
-        for category in self.blog.categories:
-            posts = [
-                post
-                for post in self.blog.posts
-                if category in post['categories']]
+        for category, posts in self.blog.categories.items():
             self._create_post_list(
                 posts,
                 sections=[CATEGORY, category.replace(' ', '-')])
@@ -212,11 +584,7 @@ class Renderer:
         """
         Create the tag pages.
         """
-        for tag in self.blog.tags:
-            posts = [
-                post
-                for post in self.blog.posts
-                if tag in post['tags']]
+        for tag, posts in self.blog.tags.items():
             self._create_post_list(
                 posts,
                 sections=[TAG, tag.replace(' ', '-')])
@@ -225,11 +593,72 @@ class Renderer:
         """
         Create the category list.
         """
-        # Sort categories alphabetically.
-        categories = sorted(
-            self.blog.categories.keys(),
-            key=lambda k: SORT_ORDER.find(k[0].lower()))
-        return categories
+        return self.blog.category_menu
 
-    def _create_atom_feed(self):
-        raise NotImplementedError()
+    def _create_feeds(self):
+        """
+        Create the Atom feeds for the blog and every tag and category.
+        """
+        author = config.AUTHOR or self.blog.title
+        self._create_atom_feed(self.blog.posts, self.blog.title, author)
+        for tag, posts in self.blog.tags.items():
+            self._create_atom_feed(
+                posts,
+                '{0}: {1}'.format(self.blog.title, tag),
+                author,
+                sections=[TAG, tag.replace(' ', '-')])
+        for category, posts in self.blog.categories.items():
+            self._create_atom_feed(
+                posts,
+                '{0}: {1}'.format(self.blog.title, category),
+                author,
+                sections=[CATEGORY, category.replace(' ', '-')])
+
+    def _create_sitemaps(self):
+        """
+        Create the XML sitemaps from the html outputs recorded in
+        the manifest. Post pages use the post date as their lastmod,
+        other pages the time their file was last written.
+        """
+        post_dates = {
+            self.urls.path(POST, post['slug']): post['date']
+            for post in self.blog.posts}
+
+        def urls():
+            for output in sorted(self.manifest.outputs()):
+                if not output.endswith('.html'):
+                    continue
+                date = post_dates.get(output)
+                if date is None and output in self.manifest.files:
+                    date = datetime.datetime.fromtimestamp(
+                        self.manifest.files[output][0] // 10 ** 9,
+                        datetime.timezone.utc)
+                lastmod = None if date is None else feed.format_date(date)
+                yield util.make_url(config.BASE_URL, output), lastmod
+
+        for name, content in sitemap.generate_sitemaps(
+                config.BASE_URL,
+                urls(),
+                name=SITEMAP,
+                compress=config.SITEMAP_GZIP):
+            self._post(content, name)
+            self.manifest.record(name, '')
+
+    def _create_atom_feed(self, posts, title, author, sections=()):
+        """
+        Queue an Atom feed of the newest `posts`, which is skipped
+        like a page when the feed's entries are unchanged.
+        """
+        posts = posts[:self.feed_entries]
+        if not posts:
+            return
+        self._write(
+            FEED,
+            self.output_dir.joinpath(self.urls.path(*sections, FEED)),
+            [post.get('path') for post in posts],
+            (title, author, [post['slug'] for post in posts]),
+            title=title,
+            feed_url=self.urls(*sections, FEED),
+            site_url=self.urls(*sections, INDEX),
+            posts=posts,
+            author=author)
@@ -0,0 +1,279 @@
+"""
+Auto reloading development server.
+
+Pages are rendered on demand and kept in memory until a source
+file, template or static file they depend on changes.
+"""
+
+import http.server
+import mimetypes
+import os
+import pathlib
+import threading
+import time
+import urllib.parse
+
+from . import site
+from . import util
+from .config import blog_config as config
+from .constants import *  # noqa
+
+
+class Watcher:
+    """
+    Polls directories for files which were added, changed or removed.
+    """
+
+    def __init__(self, *dirs):
+        self.dirs = [str(dir_) for dir_ in dirs if dir_ is not None]
+        self._files = self._scan()
+
+    def _scan(self):
+        files = {}
+        stack = list(self.dirs)
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def changes(self):
+        """
+        Return the sets of paths changed and removed since the
+        last call.
+        """
+        files = self._scan()
+        changed = {
+            path
+            for path, stat in files.items()
+            if self._files.get(path) != stat}
+        removed = set(self._files) - set(files)
+        self._files = files
+        return changed, removed
+
+
+def _structure(post):
+    # The fields deciding which outputs a post appears in and where,
+    # rather than what it shows.
+    return (
+        post['date'], post['slug'], post['menu_name'],
+        post['tags'], post['categories'])
+
+
+def _update(post, new):
+    # Update `post` in place so the planned jobs showing it stay valid.
+    for name in ('body', 'title', 'author', '_description'):
+        setattr(post, name, getattr(new, name))
+    post._excerpt = None
+
+
+class DevServer:
+    """
+    Serves a blog from memory, re-reading only the source files
+    which changed since the last request.
+
+    Files are checked for changes at most every `poll_interval`
+    seconds. Sources which fail to load are listed in `errors`,
+    and the last version which loaded is served until they're fixed.
+    """
+
+    def __init__(
+            self,
+            blog,
+            renderer,
+            poll_interval=config.SERVER_POLL_INTERVAL):
+        self.blog = blog
+        self.renderer = renderer
+        self.poll_interval = poll_interval
+        self.site = site.Site()
+        self.errors = {}
+        self.static_dirs = {
+            STYLE: config.STYLE_DIR,
+            SCRIPT: config.SCRIPT_DIR,
+            IMAGE: config.IMAGE_DIR,
+        }
+        self._lock = threading.Lock()
+        self._routes = None
+        self._polled = time.monotonic()
+        self._posts = {str(post['path']): post for post in blog.posts}
+        self._pages = {str(page['path']): page for page in blog.pages}
+        self._post_watcher = Watcher(blog.post_dir)
+        self._page_watcher = Watcher(blog.page_dir)
+        self._template_watcher = Watcher(
+            config.TEMPLATE_DIR,
+            pathlib.Path(__file__).parent.joinpath(TEMPLATE_DIR),
+            *self.static_dirs.values())
+
+    def refresh(self):
+        """
+        Apply any changes to the sources since the last refresh.
+
+        A post or page whose place in the blog is unchanged is
+        updated in place and only the outputs which depend on it
+        are discarded. Otherwise, or when a template or static file
+        changes, the outputs are planned again.
+        """
+        now = time.monotonic()
+        if now - self._polled < self.poll_interval:
+            return
+        self._polled = now
+
+        replan = False
+        for watcher, sources, cls in [
+                (self._post_watcher, self._posts, util.Post),
+                (self._page_watcher, self._pages, util.Page)]:
+            changed, removed = watcher.changes()
+            for path in sorted(changed | removed):
+                if path.endswith('.md'):
+                    replan |= self._reload(sources, path, path in changed, cls)
+
+        changed, removed = self._template_watcher.changes()
+        if replan or changed or removed:
+            self._routes = None
+            self.site = site.Site()
+
+    def _reload(self, sources, path, exists, cls):
+        """
+        Reload the post or page at `path` returning `True` if the
+        outputs need planning again.
+        """
+        old = sources.get(path)
+        new = None
+        if exists:
+            try:
+                new = util.read_post(pathlib.Path(path), cls)
+            except Exception as error:
+                self.errors[path] = '{0}: {1}'.format(
+                    type(error).__name__, error)
+                return False
+        self.errors.pop(path, None)
+
+        if old is not None and new is not None and (
+                _structure(old) == _structure(new)):
+            _update(old, new)
+            self.renderer.fragments.discard('post_snippet.html', old['slug'])
+            if self._routes is not None:
+                for uri in self.renderer.manifest.dependants(path):
+                    if uri in self.site:
+                        self.site.delete(uri)
+            return False
+
+        if new is None:
+            del sources[path]
+        else:
+            sources[path] = new
+        if cls is util.Page:
+            self.blog.pages = sorted(
+                sources.values(),
+                key=lambda page: util.menu_key(page['menu_name']))
+        else:
+            if old is not None:
+                self.blog.remove_post(old)
+            if new is not None:
+                self.blog.add_post(new)
+        return True
+
+    def error_report(self):
+        """
+        Return a plain text list of the sources which failed to
+        load, or `None` if every source loaded.
+        """
+        with self._lock:
+            if not self.errors:
+                return None
+            return ''.join(
+                '{0}\n    {1}\n'.format(path, error)
+                for path, error in sorted(self.errors.items()))
+
+    def get(self, uri):
+        """
+        Return the rendered bytes for `uri` or `None`.
+        """
+        with self._lock:
+            self.refresh()
+            if uri in self.site:
+                return self.site.get(uri)
+            if self._routes is None:
+                self._routes = self.renderer.plan()
+            job = self._routes.get(uri)
+            if job is None:
+                return self._get_asset(uri)
+            content = self.renderer.render_job(job)
+            self.site.post(content, uri)
+            return content
+
+    def _get_asset(self, uri):
+        for asset in self.renderer.assets.values():
+            if asset.uri == uri:
+                self.site.post(asset.content, uri)
+                return asset.content
+        return None
+
+    def get_static(self, uri):
+        """
+        Return the path of the static file at `uri` or `None`.
+        """
+        parts = uri.split('/')
+        if len(parts) < 3 or parts[1] not in self.static_dirs:
+            return None
+        if '..' in parts:
+            return None
+        path = pathlib.Path(self.static_dirs[parts[1]], *parts[2:])
+        return path if path.is_file() else None
+
+    def serve(self, host='localhost', port=8000):
+        """
+        Serve the blog until interrupted.
+        """
+        httpd = http.server.ThreadingHTTPServer((host, port), RequestHandler)
+        httpd.dev_server = self
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        dev_server = self.server.dev_server
+        uri = urllib.parse.unquote(
+            urllib.parse.urlsplit(self.path).path).lstrip('/')
+        if not uri or uri.endswith('/'):
+            uri += INDEX
+
+        content = None
+        if uri.startswith(STATIC + '/'):
+            path = dev_server.get_static(uri)
+            if path is not None:
+                content = path.read_bytes()
+        if content is None:
+            content = dev_server.get(uri)
+
+        content_type = (
+            mimetypes.guess_type(uri)[0] or 'application/octet-stream')
+        errors = dev_server.error_report()
+        if errors is not None and content_type == 'text/html':
+            # Show why an edit isn't showing up rather than the page.
+            content = 'Failed to load:\n\n{0}'.format(errors).encode('utf-8')
+            self.send_response(500)
+            content_type = 'text/plain; charset=utf-8'
+        elif content is None:
+            self.send_error(404)
+            return
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(content)
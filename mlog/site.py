@@ -1,58 +1,386 @@
+import hashlib
+import io
+import pathlib
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+
+from .util import write_atomic
+
+
+def _unchanged(path, content, fingerprint=None, digest=None):
+    """
+    Return `True` if the file at `path` already holds `content`.
+
+    When the file's mtime and size match its `fingerprint` the
+    recorded digest is compared instead of reading the file.
+    """
+    try:
+        stat = path.stat()
+        if stat.st_size != len(content):
+            return False
+        if fingerprint is not None and fingerprint[:2] == [
+                stat.st_mtime_ns, stat.st_size]:
+            return fingerprint[2] == digest
+        return path.read_bytes() == content
+    except OSError:
+        return False
+
+
+def _write_file(path, content, fingerprint=None):
+    """
+    Write `content` to `path` unless it is unchanged, returning
+    whether the file was written and its new fingerprint.
+    """
+    digest = hashlib.sha1(content).hexdigest()
+    written = not _unchanged(path, content, fingerprint, digest)
+    if written:
+        write_atomic(path, content)
+    stat = path.stat()
+    return written, [stat.st_mtime_ns, stat.st_size, digest]
+
+
+class Writer:
+    """
+    Writes files to the directory `path` from a pool of `workers`
+    threads, so content can be written while more is produced.
+
+    `write` queues content and blocks once `max_pending` files are
+    waiting, keeping memory bounded when the disk can't keep up.
+    Unchanged files are skipped as with `Site.flush`, and each
+    directory is only created once.
+    """
+
+    def __init__(self, path, workers=8, fingerprints=None, max_pending=64):
+        self.path = pathlib.Path(path)
+        self.fingerprints = {} if fingerprints is None else fingerprints
+        self.written = []
+        self._queue = queue.Queue(max_pending)
+        self._directories = set()
+        self._error = None
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, uri, content):
+        """
+        Queue `content` to be written to `uri`.
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((uri, content))
+
+    def close(self):
+        """
+        Wait for the queued files to be written, returning the urls
+        which were written. The first error a writer hit is raised.
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._error is not None:
+            raise self._error
+        return sorted(self.written)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            uri, content = item
+            try:
+                path = self.path.joinpath(uri)
+                if path.parent not in self._directories:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    self._directories.add(path.parent)
+                wrote, self.fingerprints[uri] = _write_file(
+                    path, content, self.fingerprints.get(uri))
+                if wrote:
+                    self.written.append(uri)
+            except Exception as error:
+                self._error = error
+
+
+class _Directory:
+    """
+    A directory within a `Site`, holding its children by name
+    along with the number of files and bytes beneath it.
+    """
+
+    __slots__ = ('children', 'files', 'bytes')
+
+    def __init__(self):
+        self.children = {}
+        self.files = 0
+        self.bytes = 0
+
+
+def _size(content):
+    try:
+        return len(content)
+    except TypeError:
+        return 0
+
+
 class Site:
     """
     A website.
+
+    Content is held in a trie of directories, for directory views,
+    prefix queries and size accounting, along with a flat index of
+    every url so looking up or listing content never walks the trie.
     """
 
+    __slots__ = ('_root', '_prefix', '_parents', '_index')
+
     def __init__(self):
-        self._site = {}
+        self._root = _Directory()
+        self._prefix = ''
+        self._parents = ()
+        self._index = {}
+
+    @classmethod
+    def _view(cls, site, directory, prefix, parents):
+        """
+        Return a `Site` for a directory of `site` sharing its index.
+        """
+        view = cls.__new__(cls)
+        view._root = directory
+        view._prefix = prefix
+        view._parents = parents
+        view._index = site._index
+        return view
 
     def get(self, uri=''):
         """
-        Get the content at `uri`.
+        Get the content at `uri`, or a `Site` for the directory
+        at `uri`.
         """
-        response = self._site
-        for part in self._parts(uri):
-            response = response[part]
-        return response
+        try:
+            return self._index[self._prefix + uri]
+        except KeyError:
+            pass
+        parts = self._parts(uri)
+        try:
+            return self._index[self._prefix + '/'.join(parts)]
+        except KeyError:
+            pass
+        parents = list(self._parents)
+        directory = self._root
+        for part in parts:
+            parents.append(directory)
+            directory = directory.children[part]
+            if not isinstance(directory, _Directory):
+                raise KeyError(uri)
+        return self._view(
+            self,
+            directory,
+            self._prefix + '/'.join(parts) + '/',
+            tuple(parents))
 
     def post(self, content, uri):
         """
         Put the content at the given URI
         """
-        head, tail = self._split(uri)
-        if tail is None:
-            self._site[head] = content
+        parts = self._parts(uri)
+        directories = list(self._parents) + [self._root]
+        directory = self._root
+        for index, part in enumerate(parts[:-1]):
+            child = directory.children.get(part)
+            if not isinstance(child, _Directory):
+                if part in directory.children:
+                    self._discard(
+                        directories,
+                        part,
+                        self._prefix + '/'.join(parts[:index + 1]))
+                child = directory.children[part] = _Directory()
+            directory = child
+            directories.append(directory)
+
+        name = parts[-1]
+        key = self._prefix + '/'.join(parts)
+        if isinstance(directory.children.get(name), _Directory):
+            self._discard(directories, name, key)
+        files, size = 1, _size(content)
+        if key in self._index:
+            files, size = 0, size - _size(self._index[key])
+        directory.children[name] = content
+        self._index[key] = content
+        for directory in directories:
+            directory.files += files
+            directory.bytes += size
+
+    def delete(self, uri):
+        """
+        Remove the content, or the whole directory, at `uri`.
+        """
+        parts = self._parts(uri)
+        directories = list(self._parents) + [self._root]
+        for part in parts[:-1]:
+            directory = directories[-1].children.get(part)
+            if not isinstance(directory, _Directory):
+                raise KeyError(uri)
+            directories.append(directory)
+
+        if parts[-1] not in directories[-1].children:
+            raise KeyError(uri)
+        self._discard(
+            directories, parts[-1], self._prefix + '/'.join(parts))
+
+        # Prune the directories left empty, though never this one.
+        for depth in range(len(directories) - 1, len(self._parents), -1):
+            if directories[depth].children:
+                break
+            del directories[depth - 1].children[parts[depth - 1 - len(
+                self._parents)]]
+
+    def _discard(self, directories, name, key):
+        """
+        Remove `name`, a file or directory at `key`, from the last of
+        `directories` and its size from all of them.
+        """
+        child = directories[-1].children.pop(name)
+        if isinstance(child, _Directory):
+            files, size = child.files, child.bytes
+            for path, _ in self._walk(child, key + '/'):
+                del self._index[path]
         else:
-            site = self._site.setdefault(head, Site())
-            site.post(content, tail)
+            files, size = 1, _size(child)
+            del self._index[key]
+        for directory in directories:
+            directory.files -= files
+            directory.bytes -= size
 
-    def spider(self):
+    def spider(self, prefix=''):
         """
-        Generator for all urls belonging to this site.
+        Generator for all urls belonging to this site,
+        or to its directory `prefix`.
         """
-        for key in self._site:
-            if isinstance(self._site[key], Site):
-                for fragment in self._site[key].spider():
-                    yield self._join(key, fragment)
-            else:
-                yield key
+        for uri, _ in self.items(prefix):
+            yield uri
 
-    def __str__(self):
-        return 'Website:\n    ' + '\n    '.join(self.spider())
+    def items(self, prefix=''):
+        """
+        Generator for all urls and their content,
+        optionally only those within the directory `prefix`.
+        """
+        if not prefix and not self._parents:
+            yield from self._index.items()
+            return
+        site = self.get(prefix) if prefix else self
+        if not isinstance(site, Site):
+            raise KeyError(prefix)
+        start = len(self._prefix)
+        for uri, content in self._walk(site._root, site._prefix):
+            yield uri[start:], content
 
-    def _split(self, uri):
+    @staticmethod
+    def _walk(directory, prefix):
         """
-        Return the parent path and the tail.
+        Iterate over the urls, prefixed with `prefix`, and
+        content beneath `directory` without recursion.
+        """
+        stack = [(prefix, directory)]
+        while stack:
+            prefix, directory = stack.pop()
+            for name, child in directory.children.items():
+                if isinstance(child, _Directory):
+                    stack.append((prefix + name + '/', child))
+                else:
+                    yield prefix + name, child
+
+    @property
+    def size(self):
         """
-        if '/' in uri:
-            return uri.split('/', 1)
-        return [uri, None]
+        The total size in bytes of the content.
+        """
+        return self._root.bytes
+
+    def __len__(self):
+        return self._root.files
+
+    def __contains__(self, uri):
+        return (
+            self._prefix + uri in self._index or
+            self._prefix + '/'.join(self._parts(uri)) in self._index)
+
+    def flush(self, path, workers=8, fingerprints=None):
+        """
+        Write the site to the directory `path` using a pool of
+        `workers` threads. Files which already hold the same
+        content are left untouched, keeping their mtimes.
+
+        `fingerprints` is an optional dict of url to the mtime, size
+        and digest of each file when it was last flushed. It allows
+        unchanged files to be skipped without being read and is
+        updated with the new fingerprints.
+
+        Returns the urls which were written.
+        """
+        writer = Writer(path, workers, fingerprints)
+        try:
+            for uri, content in self.items():
+                writer.write(uri, content)
+        finally:
+            written = writer.close()
+        return written
+
+    def diff(self, path):
+        """
+        Return the urls whose content differs from the files
+        within the directory `path`.
+        """
+        path = pathlib.Path(path)
+        return [
+            uri
+            for uri, content in self.items()
+            if not _unchanged(path.joinpath(uri), content)]
+
+    def archive(self, path):
+        """
+        Write the site to a zip file, or a tar file optionally
+        gzipped, depending on the suffix of `path`.
+        """
+        path = pathlib.Path(path)
+        now = time.time()
+        if path.suffix == '.zip':
+            with zipfile.ZipFile(
+                    str(path), 'w', zipfile.ZIP_DEFLATED) as archive:
+                for uri, content in self.items():
+                    archive.writestr(uri, content)
+            return
+        mode = 'w:gz' if path.suffix in ('.gz', '.tgz') else 'w'
+        with tarfile.open(str(path), mode) as archive:
+            for uri, content in self.items():
+                info = tarfile.TarInfo(uri)
+                info.size = len(content)
+                info.mtime = now
+                archive.addfile(info, io.BytesIO(content))
+
+    def __str__(self):
+        return 'Website:\n    ' + '\n    '.join(self.spider())
 
     def __getattr__(self, attr):
-        return self._site[attr]
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return self.get(attr)
 
     def __getitem__(self, item):
-        return self._site[item]
+        return self.get(item)
 
     def _parts(self, uri):
         return [
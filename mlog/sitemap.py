@@ -0,0 +1,82 @@
+"""
+Sharded XML sitemap writer.
+
+Urls are split into sitemap files at the protocol limits of
+50,000 urls or 50MB, and a sitemap index listing every file
+is created alongside them.
+"""
+
+import gzip
+import html
+import urllib.parse
+
+
+MAX_URLS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+URLSET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="{0}">\n'.format(NAMESPACE)).encode('utf-8')
+URLSET_FOOTER = b'</urlset>\n'
+INDEX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="{0}">\n'.format(NAMESPACE)).encode('utf-8')
+INDEX_FOOTER = b'</sitemapindex>\n'
+
+
+def _entry(tag, loc, lastmod=None):
+    entry = '<{0}><loc>{1}</loc>'.format(tag, html.escape(loc, quote=False))
+    if lastmod is not None:
+        entry += '<lastmod>{0}</lastmod>'.format(lastmod)
+    return (entry + '</{0}>\n'.format(tag)).encode('utf-8')
+
+
+def _gzip(content):
+    # A fixed mtime keeps unchanged sitemaps byte identical.
+    return gzip.compress(content, mtime=0)
+
+
+def generate_sitemaps(
+        base_url,
+        urls,
+        name='sitemap.xml',
+        compress=False,
+        max_urls=MAX_URLS,
+        max_bytes=MAX_BYTES):
+    """
+    Generate the sitemap files for `urls`, an iterable of
+    (url, lastmod) pairs, followed by a sitemap index `name`.
+
+    Yields a (name, content) pair for each file, index last.
+    """
+    stem = name.rsplit('.', 1)[0]
+    suffix = '.xml.gz' if compress else '.xml'
+    names = []
+    entries = []
+    size = 0
+
+    def sitemap():
+        names.append('{0}-{1}{2}'.format(stem, len(names) + 1, suffix))
+        content = b''.join([URLSET_HEADER] + entries + [URLSET_FOOTER])
+        return names[-1], _gzip(content) if compress else content
+
+    for url, lastmod in urls:
+        entry = _entry('url', url, lastmod)
+        if entries and (
+                len(entries) >= max_urls or
+                size + len(entry) + len(URLSET_FOOTER) > max_bytes):
+            yield sitemap()
+            entries = []
+        if not entries:
+            size = len(URLSET_HEADER)
+        entries.append(entry)
+        size += len(entry)
+    if entries:
+        yield sitemap()
+
+    yield name, b''.join(
+        [INDEX_HEADER] +
+        [_entry('sitemap', urllib.parse.urljoin(base_url, sitemap))
+         for sitemap in names] +
+        [INDEX_FOOTER])
@@ -1,37 +1,145 @@
+import concurrent.futures
+import contextlib
+import datetime
+import functools
+import html
+import html.parser
 import math
+import os
 import pathlib
 import re
+import sys
 import urllib.parse
 
-import dateutil.parser
-import markdown
-
 from .config import blog_config as config
 from .constants import *  # noqa
 
 
 MARKDOWN_EXTENSIONS = ['markdown.extensions.meta']
-md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
 
+# Post bodies are converted once the metadata header is removed.
+BODY_EXTENSIONS = [
+    extension
+    for extension in MARKDOWN_EXTENSIONS
+    if extension != 'markdown.extensions.meta']
+
+
+# Dates which `datetime.fromisoformat` parses as dateutil does.
+ISO_DATE_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}'
+    r'([T ]\d{2}:\d{2}(:\d{2}(\.\d{3}|\.\d{6})?)?)?'
+    r'(Z|[+-]\d{2}:\d{2})?$')
+
+# The metadata header format of the markdown meta extension.
+META_RE = re.compile(r'^[ ]{0,3}(?P<key>[A-Za-z0-9_-]+):\s*(?P<value>.*)')
+META_MORE_RE = re.compile(r'^[ ]{4,}(?P<value>.*)')
+BEGIN_RE = re.compile(r'^-{3}(\s.*)?')
+END_RE = re.compile(r'^(-{3}|\.{3})(\s.*)?')
 
-def strip_html(html):
+
+@functools.lru_cache(maxsize=None)
+def _markdown(*extensions):
+    """
+    Return a shared markdown instance using `extensions`,
+    markdown is only imported once one is needed.
     """
-    Strip well formed HTML tags from text.
+    import markdown
+    return markdown.Markdown(extensions=list(extensions))
+
+
+def __getattr__(name):
+    # The module level markdown instances are created on first use.
+    if name == 'md':
+        return _markdown(*MARKDOWN_EXTENSIONS)
+    if name == 'body_md':
+        return _markdown(*BODY_EXTENSIONS)
+    raise AttributeError(
+        'module {0!r} has no attribute {1!r}'.format(__name__, name))
 
-    This is woefully inadequate but may do as a
-    temporary stop-gap until a better solution
-    can be implemented.
+
+class _TextExtractor(html.parser.HTMLParser):
+    """
+    Collects the text of an html document, with entities decoded,
+    until `length` characters have been seen.
     """
-    match = re.compile(r'<[^>]*>')
-    return match.sub('', html)
 
+    # Elements whose content is not text.
+    SKIP = frozenset(['script', 'style'])
+
+    def __init__(self, length):
+        super().__init__(convert_charrefs=True)
+        self.length = length
+        self.count = 0
+        self.text = []
+        self._skipping = 0
+
+    @property
+    def done(self):
+        return self.count > self.length
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping and not self.done:
+            self.text.append(data)
+            self.count += len(data)
 
-def generate_excerpt(html, length=config.EXCERPT_CHAR_COUNT):
+
+def extract_text(html_, length, chunk_size=512):
+    """
+    Return up to `length` characters of the text of `html_`.
+
+    The html is parsed a chunk at a time so parsing stops
+    as soon as enough text has been found.
+    """
+    parser = _TextExtractor(length)
+    for start in range(0, len(html_), chunk_size):
+        parser.feed(html_[start:start + chunk_size])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return ''.join(parser.text)[:length]
+
+
+def generate_excerpt(html_, length=config.EXCERPT_CHAR_COUNT):
     """
     Generate an excerpt from a given string of html.
     """
     return '<p>{0}...</p>'.format(
-        strip_html(html)[:length])
+        html.escape(extract_text(html_, length), quote=False))
+
+
+def write_atomic(path, content):
+    """
+    Write the bytes `content` to `path` through a hidden temporary
+    file, so the file is never seen partly written.
+    """
+    path = pathlib.Path(path)
+    tmp = path.with_name('.{0}.tmp'.format(path.name))
+    tmp.write_bytes(content)
+    tmp.replace(path)
+
+
+def menu_key(name):
+    """
+    Sort key placing names in menu order.
+    """
+    return SORT_ORDER.find(name[0].lower())
+
+
+def sort_menu(names):
+    """
+    Return `names` sorted in menu order, names sharing a menu key
+    are sorted by name so the menu doesn't change with post dates.
+    """
+    return sorted(names, key=lambda name: (menu_key(name), name))
 
 
 def make_url(base, *fragments):
@@ -42,13 +150,80 @@ def make_url(base, *fragments):
     return urllib.parse.urljoin(base, path)
 
 
-def get_section(section, default='', split=None):
+class UrlBuilder:
+    """
+    Builds the urls and output paths of the site, memoizing both
+    as the same few are needed by every page.
+
+    `scheme` maps a section, such as `POST` or `TAG`, to the path
+    it is published under with a `{slug}` placeholder for the rest
+    of the url. Sections not in the scheme are published under
+    their own name.
+    """
+
+    def __init__(self, base, scheme=None):
+        self.base = base
+        self.scheme = dict(scheme or {})
+        self._urls = {}
+        self._paths = {}
+
+    def __call__(self, *fragments):
+        """
+        Return the absolute url for the given fragments.
+        """
+        try:
+            return self._urls[fragments]
+        except KeyError:
+            url = self._urls[fragments] = make_url(
+                self.base, self.path(*fragments))
+            return url
+
+    def path(self, *fragments):
+        """
+        Return the path relative to the site root for the given
+        fragments.
+        """
+        try:
+            return self._paths[fragments]
+        except KeyError:
+            pass
+        if fragments and fragments[0] in self.scheme:
+            mapped = [self.scheme[fragments[0]].format(
+                slug='/'.join(fragments[1:]))]
+        else:
+            mapped = fragments
+        path = self._paths[fragments] = pathlib.Path(*mapped).as_posix()
+        return path
+
+
+def site_urls():
+    """
+    Return the `UrlBuilder` for the configured base url and url
+    scheme, shared until either changes.
+    """
+    global _site_urls
+    if (_site_urls is None or
+            _site_urls.base != config.BASE_URL or
+            _site_urls.scheme != config.URLS):
+        _site_urls = UrlBuilder(config.BASE_URL, config.URLS)
+    return _site_urls
+
+
+_site_urls = None
+
+
+def get_section(section, default='', split=None, meta=None):
     """
     Return a metadta section from a markdown document.
     If the optional `split` argument is provided
     return a list which is split.
+
+    `meta` defaults to the metadata of the last document
+    converted by the module level markdown instance.
     """
-    section = ''.join(md.Meta.get(section, default))
+    if meta is None:
+        meta = _markdown(*MARKDOWN_EXTENSIONS).Meta
+    section = ''.join(meta.get(section, default))
     if split is not None:
         section = [
             element.strip()
@@ -57,26 +232,269 @@ def get_section(section, default='', split=None):
     return section
 
 
-def read_post(path):
+def parse_date(value, formats=None):
     """
-    Read a blog post from a given file.
+    Parse a post's date.
+
+    ISO 8601 dates and those matching one of `formats`, which
+    defaults to the `DATE_FORMATS` setting, are parsed directly
+    and anything else by dateutil. Results are memoized.
+    """
+    if formats is None:
+        formats = config.DATE_FORMATS
+    return _parse_date(value, tuple(formats))
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_date(value, formats):
+    stripped = value.strip()
+    if ISO_DATE_RE.match(stripped):
+        try:
+            return datetime.datetime.fromisoformat(stripped)
+        except ValueError:
+            pass
+    for format_ in formats:
+        try:
+            return datetime.datetime.strptime(stripped, format_)
+        except ValueError:
+            pass
+    import dateutil.parser
+    return dateutil.parser.parse(value)
+
+
+def split_meta(text):
+    """
+    Split a markdown document into its metadata, in the same
+    form as the markdown meta extension, and its body.
+    """
+    text = text.replace('\r\n', '\n').replace('\r', '\n').expandtabs(4)
+    lines = text.split('\n')
+    meta = {}
+    key = None
+    index = 0
+    if lines and BEGIN_RE.match(lines[0]):
+        index = 1
+    while index < len(lines):
+        line = lines[index]
+        if line.strip() == '' or END_RE.match(line):
+            index += 1
+            break
+        match = META_RE.match(line)
+        if match:
+            key = match.group('key').lower().strip()
+            meta.setdefault(key, []).append(match.group('value').strip())
+        else:
+            match = META_MORE_RE.match(line)
+            if not (match and key):
+                break
+            meta[key].append(match.group('value').strip())
+        index += 1
+    return meta, '\n'.join(lines[index:])
+
+
+# Html converted during the current `render_pass`, by body.
+_converted = None
+
+
+@contextlib.contextmanager
+def render_pass():
+    """
+    Keep every body converted within the with statement, so each
+    is converted at most once however many outputs include it.
+    """
+    global _converted
+    outer = _converted
+    if outer is None:
+        _converted = {}
+    try:
+        yield
+    finally:
+        _converted = outer
+
+
+def _convert_markdown(text):
+    return _markdown(*BODY_EXTENSIONS).reset().convert(text)
+
+
+@functools.lru_cache(maxsize=config.CONTENT_CACHE_SIZE)
+def _cached_convert(text):
+    return _convert_markdown(text)
+
+
+def convert_markdown(text):
+    """
+    Convert a markdown post body to html. The most recently
+    used conversions are cached, and within a `render_pass`
+    every conversion is.
+    """
+    if _converted is None:
+        return _cached_convert(text)
+    html_ = _converted.get(text)
+    if html_ is None:
+        html_ = _converted[text] = _cached_convert(text)
+    return html_
+
+
+class Post:
+    """
+    A blog post.
+
+    Attributes are also available as items so posts can be used
+    wherever a post dict is expected. The html `content`, and the
+    `description` when the post has none, are converted from the
+    markdown body on access and not kept on the post, so only the
+    bodies held by the `convert_markdown` cache, or converted during
+    a `render_pass`, stay in memory.
+    The much smaller `excerpt` is kept once generated.
+    """
+
+    __slots__ = (
+        'body', 'title', 'tags', 'categories', 'menu_name', 'author',
+        'date', 'slug', 'path', 'url', '_description', '_excerpt')
+
+    # The url section the post is published under.
+    section = POST
+
+    def __init__(
+            self,
+            body,
+            title,
+            tags,
+            categories,
+            menu_name,
+            author,
+            date,
+            slug,
+            path=None,
+            description=None):
+        self.body = body
+        self.title = title
+        self.tags = [sys.intern(tag) for tag in tags]
+        self.categories = [sys.intern(category) for category in categories]
+        self.menu_name = menu_name
+        self.author = sys.intern(author)
+        self.date = date
+        self.slug = slug
+        self.path = path
+        self.url = site_urls()(self.section, slug)
+        self._description = description or None
+        self._excerpt = None
+
+    @property
+    def content(self):
+        return convert_markdown(self.body)
+
+    @property
+    def excerpt(self):
+        if self._excerpt is None:
+            self._excerpt = generate_excerpt(self.content)
+        return self._excerpt
+
+    @property
+    def description(self):
+        if self._description is None:
+            return self.excerpt
+        return self._description
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def _values(self):
+        return tuple(
+            getattr(self, name)
+            for name in self.__slots__
+            if name != '_excerpt')
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        return '<{0} {1}>'.format(type(self).__name__, self.slug)
+
+
+class Page(Post):
+    """
+    A static page.
+    """
+
+    __slots__ = ()
+
+    section = PAGE
+
+
+def read_post(path, cls=Post):
+    """
+    Read a blog post, or another `Post` subclass, from a given file.
+
+    Only the metadata header is parsed, the body is
+    converted when the post's content is first used.
     """
     with path.open() as fh:
-        html = md.convert(fh.read())
-        post = {
-            'content': html,
-            'title': get_section('title'),
-            'description': get_section('description'),
-            'tags': get_section('tags', split=','),
-            'categories': get_section('categories', split=','),
-            'menu_name': path.name.rsplit('.', 1)[0],
-            'author': get_section('author'),
-            'date': dateutil.parser.parse(get_section('date')),
-            'slug': path.name.replace('.md', '.html'),
-        }
-    if not post['description']:
-        post['description'] = excerpt(post['content'])
-    return post
+        meta, body = split_meta(fh.read())
+    return cls(
+        body,
+        title=get_section('title', meta=meta),
+        tags=get_section('tags', split=',', meta=meta),
+        categories=get_section('categories', split=',', meta=meta),
+        menu_name=path.name.rsplit('.', 1)[0],
+        author=get_section('author', meta=meta),
+        date=parse_date(get_section('date', meta=meta)),
+        slug=path.name.replace('.md', '.html'),
+        path=path,
+        description=get_section('description', meta=meta))
+
+
+def read_posts(paths, workers=1, cache=None, cls=Post):
+    """
+    Read the posts, instances of `cls`, at `paths` returning
+    them in the same order.
+
+    When `workers` is greater than one the files are parsed
+    across a pool of that many processes, `None` uses one
+    process per CPU.
+
+    If a `cache` is given posts are looked up there first and
+    any which had to be parsed are added to it.
+    """
+    paths = list(paths)
+    posts = [None] * len(paths)
+    if cache is not None:
+        posts = [cache.get(path) for path in paths]
+    missing = [
+        path
+        for path, post in zip(paths, posts)
+        if post is None]
+
+    parsed = iter(_parse_posts(missing, workers, cls))
+    for index, post in enumerate(posts):
+        if post is None:
+            posts[index] = post = next(parsed)
+            if cache is not None:
+                cache.put(paths[index], post)
+    return posts
+
+
+def _parse_posts(paths, workers, cls):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(paths) <= 1:
+        return [read_post(path, cls) for path in paths]
+
+    chunksize = max(1, len(paths) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers) as executor:
+        return list(executor.map(
+            functools.partial(read_post, cls=cls),
+            paths,
+            chunksize=chunksize))
 
 
 def gen_page_names():
@@ -102,13 +520,33 @@ class Pager:
     """
     Helper class for creating next/prev links on list pages.
 
+    Pages are numbered from the newest items, `index.html`,
+    `2.html` and so on, so every page shifts when an item is added.
+
+    With `stable` pages are instead numbered from the oldest items.
+    The index holds the newest items, between `per_page` and twice
+    that less one, and each older page always holds the same
+    `per_page` items. Adding an item then only changes the index,
+    and every `per_page` items a new page and its newer neighbour.
+
+    Page contexts are only computed when asked for.
+
     TODO: Rethink this class.
     """
 
-    def __init__(self, items, per_page):
+    def __init__(self, items, per_page, stable=False):
         self._items = items
         self._per_page = per_page
-        self._page_names = page_names(self.page_count)
+        self._stable = stable
+        # The number of full pages after the index when stable.
+        self._archived = max(len(items) // per_page - 1, 0)
+
+    def __iter__(self):
+        """
+        Generate the context of each page, newest first.
+        """
+        for page_index in range(self.page_count):
+            yield self.page_context(page_index)
 
     def page_context(self, page_index):
         """
@@ -125,6 +563,12 @@ class Pager:
         """
         The items for page with given index.
         """
+        if self._stable:
+            end = len(self._items) - (
+                self._archived - page_index) * self._per_page
+            if page_index == 0:
+                return self._items[:end]
+            return self._items[end - self._per_page:end]
         start = page_index * self._per_page
         return self._items[start:start + self._per_page]
 
@@ -133,9 +577,15 @@ class Pager:
         """
         Return the total amount of pages.
         """
+        if self._stable:
+            return self._archived + 1 if self._items else 0
         return math.ceil(len(self._items) / self._per_page)
 
     def _get_filename(self, page_index):
         if 0 > page_index or page_index >= self.page_count:
             return
-        return self._page_names[page_index]
+        if page_index == 0:
+            return INDEX
+        if self._stable:
+            return '{0}.html'.format(self._archived - page_index + 1)
+        return '{0}.html'.format(page_index + 1)
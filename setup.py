@@ -32,7 +32,7 @@ setup(
         'Programming Language :: Python :: 3.5'
     ],
     keywords='static blog generator',
-    packages=find_packages(exclude=['docs', 'tests*']),
+    packages=find_packages(exclude=['docs', 'tests*', 'benchmarks*']),
     install_requires=read_requirements('requirements.txt'),
     include_package_data=True,
     package_data={
@@ -0,0 +1,70 @@
+import pathlib
+import tempfile
+import unittest
+
+import mock
+
+from mlog import assets
+
+
+class TestMinify(unittest.TestCase):
+
+    def test_css(self):
+        self.assertEqual(
+            'a:hover,b>i{color:red;margin:0 auto}',
+            assets.minify_css(
+                '/* comment */\na:hover, b > i {\n'
+                '    color: red;\n    margin: 0 auto;\n}\n'))
+
+    def test_css_strings(self):
+        self.assertEqual(
+            'a{content:"/* x */ ; }"}',
+            assets.minify_css('a { content: "/* x */ ; }"; }'))
+
+
+class TestBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.cache_dir = self.dir.joinpath('cache')
+        self.dir.joinpath('a.css').write_text('a { color: red; }')
+        self.dir.joinpath('b.css').write_text('b { color: blue; }')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        return assets.build_bundles(
+            {'all.css': ('a.css', 'b.css')},
+            {assets.STYLE: self.dir},
+            self.cache_dir)['all.css']
+
+    def test_bundle(self):
+        asset = self.build()
+        self.assertEqual(b'a{color:red}b{color:blue}', asset.content)
+        self.assertEqual(
+            'static/css/' + assets.fingerprint('all.css', asset.content),
+            asset.uri)
+        self.assertRegex(asset.uri, r'^static/css/all\.[0-9a-f]{10}\.css$')
+
+    def test_cached(self):
+        asset = self.build()
+        minify = mock.Mock()
+        with mock.patch.dict(
+                assets.BUNDLE_TYPES, {'.css': (assets.STYLE, minify, '')}):
+            self.assertEqual(asset, self.build())
+            self.assertFalse(minify.called)
+
+        self.dir.joinpath('b.css').write_text('b { color: green; }')
+        changed = self.build()
+        self.assertNotEqual(asset.uri, changed.uri)
+        self.assertEqual(b'a{color:red}b{color:green}', changed.content)
+
+    def test_js(self):
+        source = 'var a = `\n  // x\n`\n// comment\n'
+        self.dir.joinpath('a.js').write_text(source)
+        self.dir.joinpath('b.js').write_text('var b = 1')
+        asset = assets.build_bundles(
+            {'all.js': ('a.js', 'b.js')}, {assets.SCRIPT: self.dir})['all.js']
+        self.assertEqual((source + ';\nvar b = 1').encode(), asset.content)
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+
+from benchmarks import corpus
+from benchmarks import suite
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_generate(self):
+        corpus_ = corpus.generate(
+            self.tmp.name, posts=6, tags=4, categories=2, pages=2)
+        context = suite.Context(corpus_, self.tmp.name)
+        blog = context.blog
+        self.assertEqual(6, len(blog.posts))
+        self.assertEqual(2, len(blog.pages))
+        self.assertLessEqual(len(blog.tags), 4)
+        self.assertTrue(all(len(post['tags']) == 3 for post in blog.posts))
+
+    def test_deterministic(self):
+        first = corpus.generate(self.tmp.name + '/a', posts=2, seed=1)
+        second = corpus.generate(self.tmp.name + '/b', posts=2, seed=1)
+        self.assertEqual(
+            [path.read_text() for path in first.post_paths],
+            [path.read_text() for path in second.post_paths])
+
+    def test_run_benchmarks(self):
+        context = suite.Context(
+            corpus.generate(self.tmp.name, posts=3, pages=1), self.tmp.name)
+        results = list(suite.run_benchmarks(
+            context, ['load', 'pager'], repeat=1))
+        self.assertEqual(['load', 'pager'], [r.name for r in results])
+
+    def test_conversions(self):
+        context = suite.Context(
+            corpus.generate(self.tmp.name, posts=3, pages=1), self.tmp.name)
+        result, = suite.run_benchmarks(context, ['render'], repeat=1)
+        # Every post and page body is converted once per build.
+        self.assertEqual(4, result.conversions)
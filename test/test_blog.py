@@ -11,7 +11,8 @@ class TestBlog(unittest.TestCase):
         self.blog = mlog.Blog(
             title='test title',
             description='test description',
-            post_dir='foo')
+            post_dir='foo',
+            use_cache=False)
 
     def test_empty_posts(self):
         self.assertEqual([], self.blog.posts)
@@ -36,6 +37,49 @@ class TestBlog(unittest.TestCase):
             3: [post_2],
         }, self.blog.categories)
 
+    def test_menus(self):
+        self.blog.posts = [
+            {'tags': ['b', 'x'], 'categories': ['x']},
+            {'tags': ['a', '0', 'b'], 'categories': ['9', 'a']},
+        ]
+        self.assertEqual(['0', 'a', 'b', 'x'], self.blog.tag_menu)
+        self.assertEqual(['9', 'a', 'x'], self.blog.category_menu)
+
+    def test_add_post(self):
+        post_1 = {
+            'tags': ['a'],
+            'categories': [],
+            'date': datetime.datetime(2001, 1, 1)}
+        post_2 = {
+            'tags': ['a'],
+            'categories': [],
+            'date': datetime.datetime(2003, 1, 1)}
+        post_3 = {
+            'tags': ['a', 'b'],
+            'categories': [],
+            'date': datetime.datetime(2002, 1, 1)}
+        self.blog.posts = [post_2, post_1]
+        self.assertEqual(['a'], self.blog.tag_menu)
+        self.blog.add_post(post_3)
+        self.assertEqual([post_2, post_3, post_1], self.blog.posts)
+        self.assertEqual({
+            'a': [post_2, post_3, post_1],
+            'b': [post_3],
+        }, self.blog.tags)
+        self.assertEqual(['a', 'b'], self.blog.tag_menu)
+
+    def test_remove_post(self):
+        post_1 = {'tags': ['a'], 'categories': ['c']}
+        post_2 = {'tags': ['a', 'b'], 'categories': ['c']}
+        self.blog.posts = [post_2, post_1]
+        self.assertEqual(['a', 'b'], self.blog.tag_menu)
+        self.assertEqual(['c'], self.blog.category_menu)
+        self.blog.remove_post(post_2)
+        self.assertEqual([post_1], self.blog.posts)
+        self.assertEqual({'a': [post_1]}, self.blog.tags)
+        self.assertEqual(['a'], self.blog.tag_menu)
+        self.assertEqual({'c': [post_1]}, self.blog.categories)
+
     @unittest.mock.patch('mlog.blog.util.read_post')
     @unittest.mock.patch('mlog.blog.util.pathlib.Path')
     def test_load_posts_ordering(self, Path, read_post):
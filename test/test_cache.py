@@ -0,0 +1,63 @@
+import os
+import pathlib
+import tempfile
+import unittest
+
+from mlog import cache
+
+
+class TestPostCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.db = self.dir.joinpath('cache', 'posts.sqlite3')
+        self.source = self.dir.joinpath('post.md')
+        self.source.write_text('title: a')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss(self):
+        with cache.PostCache(self.db) as post_cache:
+            self.assertIsNone(post_cache.get(self.source))
+
+    def test_round_trip(self):
+        with cache.PostCache(self.db) as post_cache:
+            post_cache.get(self.source)
+            post_cache.put(self.source, {'title': 'a'})
+        with cache.PostCache(self.db) as post_cache:
+            self.assertEqual({'title': 'a'}, post_cache.get(self.source))
+
+    def test_touched_file_hits(self):
+        with cache.PostCache(self.db) as post_cache:
+            post_cache.put(self.source, {'title': 'a'})
+        os.utime(str(self.source), ns=(0, 0))
+        with cache.PostCache(self.db) as post_cache:
+            self.assertEqual({'title': 'a'}, post_cache.get(self.source))
+
+    def test_changed_file_misses(self):
+        with cache.PostCache(self.db) as post_cache:
+            post_cache.put(self.source, {'title': 'a'})
+        self.source.write_text('title: changed')
+        with cache.PostCache(self.db) as post_cache:
+            self.assertIsNone(post_cache.get(self.source))
+
+    def test_namespace(self):
+        with cache.PostCache(self.db, namespace='a') as post_cache:
+            post_cache.put(self.source, {'title': 'a'})
+        with cache.PostCache(self.db, namespace='b') as post_cache:
+            self.assertIsNone(post_cache.get(self.source))
+
+    def test_eviction(self):
+        paths = []
+        for index in range(5):
+            path = self.dir.joinpath('{0}.md'.format(index))
+            path.write_text(str(index))
+            paths.append(path)
+        with cache.PostCache(self.db, max_size=1000) as post_cache:
+            for path in paths:
+                post_cache.put(path, {'content': 'x' * 400})
+            post_cache.evict()
+            self.assertLessEqual(post_cache.size(), 1000)
+            self.assertGreater(post_cache.size(), 0)
@@ -0,0 +1,58 @@
+import gzip
+import pathlib
+import tempfile
+import unittest
+
+from mlog import compress
+
+
+class TestCompress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.dir.joinpath('post').mkdir()
+        self.content = b'<p>content</p>' * 100
+        self.dir.joinpath('index.html').write_bytes(self.content)
+        self.dir.joinpath('post', 'a.html').write_bytes(self.content)
+        self.dir.joinpath('small.html').write_bytes(b'<p>small</p>')
+        self.dir.joinpath('image.png').write_bytes(self.content)
+        self.uris = [
+            'index.html', 'post/a.html', 'small.html', 'image.png',
+            'missing.html']
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compress_files(self):
+        compressed, stats = compress.compress_files(
+            self.dir, self.uris, min_size=100, workers=2)
+        self.assertEqual(['index.html', 'post/a.html'], compressed)
+        self.assertEqual(['index.html', 'post/a.html'], sorted(stats))
+        path = self.dir.joinpath('post', 'a.html.gz')
+        self.assertEqual(self.content, gzip.decompress(path.read_bytes()))
+        self.assertEqual(
+            [len(self.content), path.stat().st_size], stats['post/a.html'][1:])
+        self.assertFalse(self.dir.joinpath('small.html.gz').exists())
+        self.assertFalse(self.dir.joinpath('image.png.gz').exists())
+
+    def test_unchanged(self):
+        _, stats = compress.compress_files(self.dir, self.uris, min_size=100)
+        gz = self.dir.joinpath('index.html.gz').read_bytes()
+        self.assertEqual(
+            ([], stats),
+            compress.compress_files(
+                self.dir, self.uris, stats, min_size=100))
+
+        self.dir.joinpath('index.html').write_bytes(self.content * 2)
+        compressed, stats = compress.compress_files(
+            self.dir, self.uris, stats, min_size=100)
+        self.assertEqual(['index.html'], compressed)
+        self.assertNotEqual(
+            gz, self.dir.joinpath('index.html.gz').read_bytes())
+
+        # A deleted copy is compressed again.
+        self.dir.joinpath('post', 'a.html.gz').unlink()
+        compressed, _ = compress.compress_files(
+            self.dir, self.uris, stats, min_size=100)
+        self.assertEqual(['post/a.html'], compressed)
@@ -0,0 +1,77 @@
+import datetime
+import io
+import unittest
+import xml.etree.ElementTree as ET
+
+from mlog import feed
+
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class TestAtomFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.posts = [
+            {
+                'title': 'Post & {0}'.format(index),
+                'description': 'description',
+                'content': '<p>Body</p>',
+                'author': 'author',
+                'date': datetime.datetime(2015, 1, 10 - index),
+                'categories': ['category'],
+                'slug': '{0}.html'.format(index),
+            }
+            for index in range(3)]
+
+    def write(self, posts):
+        fh = io.BytesIO()
+        feed.write_atom(
+            fh,
+            title='title',
+            feed_url='http://example.com/atom.xml',
+            site_url='http://example.com/',
+            posts=posts,
+            post_url=lambda post: 'http://example.com/' + post['slug'],
+            author='blog')
+        return ET.fromstring(fh.getvalue())
+
+    def test_feed(self):
+        root = self.write(self.posts)
+        self.assertEqual(ATOM + 'feed', root.tag)
+        self.assertEqual(
+            '2015-01-10T00:00:00+00:00',
+            root.find(ATOM + 'updated').text)
+        entries = root.findall(ATOM + 'entry')
+        self.assertEqual(3, len(entries))
+        self.assertEqual('Post & 0', entries[0].find(ATOM + 'title').text)
+        self.assertEqual(
+            'http://example.com/1.html',
+            entries[1].find(ATOM + 'id').text)
+        self.assertEqual(
+            '<p>Body</p>', entries[2].find(ATOM + 'content').text)
+
+    def test_author(self):
+        self.posts[1]['author'] = ''
+        root = self.write(self.posts)
+        self.assertEqual(
+            'blog', root.find(ATOM + 'author').find(ATOM + 'name').text)
+        entries = root.findall(ATOM + 'entry')
+        self.assertEqual(
+            'author',
+            entries[0].find(ATOM + 'author').find(ATOM + 'name').text)
+        self.assertIsNone(entries[1].find(ATOM + 'author'))
+
+    def test_empty_feed(self):
+        root = self.write([])
+        self.assertEqual([], root.findall(ATOM + 'entry'))
+        self.assertIsNone(root.find(ATOM + 'updated'))
+
+    def test_format_date(self):
+        self.assertEqual(
+            '2015-01-01T00:00:00+00:00',
+            feed.format_date(datetime.datetime(2015, 1, 1)))
+        tz = datetime.timezone(datetime.timedelta(hours=1))
+        self.assertEqual(
+            '2015-01-01T00:00:00+01:00',
+            feed.format_date(datetime.datetime(2015, 1, 1, tzinfo=tz)))
@@ -0,0 +1,38 @@
+import pathlib
+import subprocess
+import sys
+import unittest
+
+import mlog
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_exports(self):
+        from mlog.blog import Blog
+        from mlog.render import Renderer
+        self.assertIs(Blog, mlog.Blog)
+        self.assertIs(Renderer, mlog.Renderer)
+        with self.assertRaises(AttributeError):
+            mlog.Missing
+
+    def test_submodules(self):
+        code = 'import mlog\nprint(mlog.render.Renderer is mlog.Renderer)\n'
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=str(pathlib.Path(mlog.__file__).parent.parent),
+            stdout=subprocess.PIPE,
+            check=True).stdout
+        self.assertEqual(b'True\n', output)
+
+    def test_import_is_light(self):
+        code = (
+            'import sys, mlog, mlog.config, mlog.site, mlog.util\n'
+            'heavy = {"markdown", "dateutil", "jinja2", "pkg_resources"}\n'
+            'print(sorted(heavy & set(sys.modules)))\n')
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=str(pathlib.Path(mlog.__file__).parent.parent),
+            stdout=subprocess.PIPE,
+            check=True).stdout
+        self.assertEqual(b'[]\n', output)
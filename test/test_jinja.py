@@ -0,0 +1,103 @@
+import pathlib
+import tempfile
+import unittest
+
+import jinja2
+
+from mlog import jinja
+
+
+class TestFragmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.loader = jinja2.DictLoader({'menu.html': '{{ items|join }}'})
+        self.env = jinja2.Environment(loader=self.loader)
+        self.cache = jinja.FragmentCache(self.env)
+
+    def test_reuses_fragment(self):
+        items = ['a', 'b']
+        self.assertEqual(
+            'ab',
+            self.cache.render('menu.html', depends=(items,), items=items))
+        self.assertEqual(
+            'ab',
+            self.cache.render('menu.html', depends=(items,), items=['x']))
+
+    def test_dependency_changed(self):
+        self.cache.render('menu.html', depends=(['a'],), items=['a'])
+        self.assertEqual(
+            'b',
+            self.cache.render('menu.html', depends=(['b'],), items=['b']))
+
+    def test_keys(self):
+        items = ['a']
+        self.cache.render('menu.html', key=1, depends=(items,), items=items)
+        self.assertEqual(
+            'b',
+            self.cache.render('menu.html', key=2, depends=(items,),
+                              items=['b']))
+
+    def test_template_changed(self):
+        items = ['a']
+        self.cache.render('menu.html', depends=(items,), items=items)
+        self.loader.mapping['menu.html'] = '-{{ items|join }}'
+        self.env.cache.clear()
+        self.assertEqual(
+            '-a',
+            self.cache.render('menu.html', depends=(items,), items=items))
+
+
+class TestTemplateBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.loader = jinja2.DictLoader({
+            'base.html': '<{% block content %}{% endblock %}>',
+            'page.html': (
+                '{% extends "base.html" %}'
+                '{% block content %}{{ name }}{% endblock %}'),
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_compile_and_load(self):
+        bundle = pathlib.Path(self.tmp.name, 'templates.zip')
+        jinja.compile_templates(bundle, self.loader)
+        env = jinja.create_env(self.loader, bundle=bundle)
+        self.assertIsInstance(env.loader, jinja2.ModuleLoader)
+        self.assertEqual(
+            '<page>',
+            env.get_template('page.html').render(name='page'))
+
+    def test_missing_bundle(self):
+        env = jinja.create_env(
+            self.loader,
+            bundle=pathlib.Path(self.tmp.name, 'missing.zip'),
+            bytecode_cache=False)
+        self.assertIs(self.loader, env.loader)
+
+    def test_template_sources(self):
+        self.assertEqual(
+            [('base.html', '<{% block content %}{% endblock %}>')],
+            jinja.template_sources(jinja2.Environment(loader=self.loader))[:1])
+
+    def test_bundle_sources(self):
+        bundle = pathlib.Path(self.tmp.name, 'templates.zip')
+        jinja.compile_templates(bundle, self.loader)
+        env = jinja.create_env(self.loader, bundle=bundle)
+        sources = jinja.template_sources(env)
+        self.assertEqual([str(bundle)], [name for name, _ in sources])
+
+        # Only changes to the bundle itself change its sources.
+        self.loader.mapping['base.html'] = (
+            '[{% block content %}{% endblock %}]')
+        self.assertEqual(sources, jinja.template_sources(env))
+        jinja.compile_templates(bundle, self.loader)
+        self.assertNotEqual(sources, jinja.template_sources(env))
+
+    def test_bytecode_cache(self):
+        cache = jinja.BytecodeCache(str(pathlib.Path(self.tmp.name, 'bc')))
+        env = jinja2.Environment(loader=self.loader, bytecode_cache=cache)
+        env.get_template('page.html')
+        self.assertTrue(list(pathlib.Path(self.tmp.name, 'bc').iterdir()))
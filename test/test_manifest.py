@@ -0,0 +1,60 @@
+import pathlib
+import tempfile
+import unittest
+
+from mlog import manifest
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.path = self.dir.joinpath('manifest.json')
+        self.source = self.dir.joinpath('post.md')
+        self.source.write_text('content')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_missing_manifest(self):
+        manifest_ = manifest.Manifest.load(self.path)
+        self.assertTrue(manifest_.is_stale('index.html', 'abc'))
+
+    def test_source_digest(self):
+        manifest_ = manifest.Manifest.load(self.path)
+        self.assertEqual(
+            manifest.file_digest(self.source),
+            manifest_.source_digest(self.source))
+
+    def test_round_trip(self):
+        manifest_ = manifest.Manifest.load(self.path)
+        manifest_.record('post/post.html', 'abc', [str(self.source)])
+        manifest_.record('index.html', 'def', [str(self.source)])
+        manifest_.save()
+
+        manifest_ = manifest.Manifest.load(self.path)
+        self.assertFalse(manifest_.is_stale('post/post.html', 'abc'))
+        self.assertTrue(manifest_.is_stale('post/post.html', 'xyz'))
+
+    def test_files(self):
+        manifest_ = manifest.Manifest.load(self.path)
+        manifest_.files['index.html'] = [1, 2, 'abc']
+        manifest_.record('index.html', 'def')
+        manifest_.save()
+        manifest_ = manifest.Manifest.load(self.path)
+        self.assertEqual({'index.html': [1, 2, 'abc']}, manifest_.files)
+        self.assertEqual([], manifest_.outputs())
+
+    def test_dependants(self):
+        manifest_ = manifest.Manifest(self.path)
+        manifest_.record('post/a.html', 'abc', ['a.md'])
+        manifest_.record('index.html', 'abc', ['a.md', 'b.md'])
+        self.assertEqual(
+            ['index.html', 'post/a.html'],
+            manifest_.dependants('a.md'))
+        self.assertEqual(['index.html'], manifest_.dependants('b.md'))
+
+    def test_digest(self):
+        self.assertEqual(manifest.digest('a', 1), manifest.digest('a', 1))
+        self.assertNotEqual(manifest.digest('a', 1), manifest.digest('a1'))
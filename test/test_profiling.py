@@ -0,0 +1,98 @@
+import json
+import os
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from mlog import __main__, profiling, util
+
+
+class Thing:
+
+    def work(self, value):
+        return value * 2
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = profiling.Profiler()
+
+    def test_instrument(self):
+        thing = Thing()
+        self.profiler.instrument(thing, 'work')
+        self.assertEqual(4, thing.work(2))
+        thing.work(3)
+        self.assertEqual(2, self.profiler.phases['Thing.work'][0])
+
+    def test_markdown(self):
+        posts = [
+            util.Post(body, body, [], [], body, '', None, body + '.html')
+            for body in 'ab']
+        convert = util._convert_markdown
+        with self.profiler.markdown(posts):
+            self.assertEqual('<p>a</p>', posts[0].content)
+            posts[0].content
+            util.convert_markdown('c')
+        self.assertIs(convert, util._convert_markdown)
+        # Only conversions which happened are timed, once each.
+        self.assertEqual(['a.html'], list(self.profiler.posts))
+        self.assertEqual(2, self.profiler.phases['markdown'][0])
+
+    def test_markdown_setup(self):
+        util._markdown.cache_clear()
+        with self.profiler.markdown([]):
+            # Markdown was set up before any conversion was timed.
+            self.assertEqual(1, util._markdown.cache_info().currsize)
+
+    def test_report(self):
+        self.profiler.record_output('index.html', 'post_list.html', 0.2, 10)
+        self.profiler.record_output('post/a.html', 'post.html', 0.1, 5)
+        self.profiler.record_output('post/b.html', 'post.html', 0.3, 5)
+        self.profiler.record_written(2, 15)
+        report = self.profiler.as_dict()
+        self.assertEqual({'files': 3, 'bytes': 20}, report['rendered'])
+        self.assertEqual({'files': 2, 'bytes': 15}, report['written'])
+        self.assertEqual(
+            ['post.html', 'post_list.html'], list(report['templates']))
+        self.assertEqual(
+            ['post/b.html', 'index.html'],
+            [uri for uri, _ in self.profiler.slowest_outputs(2)])
+        self.assertIn('post_list.html', self.profiler.summary())
+        self.assertNotIn('Compressed', self.profiler.summary())
+        self.assertNotIn('queue render jobs', self.profiler.summary())
+        with self.profiler.phase('Renderer._create_feeds'):
+            pass
+        self.assertIn('queue render jobs', self.profiler.summary())
+
+        self.profiler.record_compressed(2, 2000, 500)
+        self.assertIn(
+            'Compressed 2 files, 2000 bytes to 500 (25.0%)',
+            self.profiler.summary())
+
+    def test_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = pathlib.Path(tmp, 'build.prof')
+            with self.profiler.run(stats):
+                Thing().work(1)
+            self.assertTrue(stats.exists())
+            path = pathlib.Path(tmp, 'build.json')
+            self.profiler.dump(path)
+            with path.open() as fh:
+                self.assertGreater(json.load(fh)['total'], 0)
+
+
+class TestProfileEnv(unittest.TestCase):
+
+    def profile_env(self, value):
+        with unittest.mock.patch.dict(os.environ, {'MLOG_PROFILE': value}):
+            return __main__.profile_env()
+
+    def test_profile_env(self):
+        for value in ['0', 'false', 'No', 'off']:
+            self.assertIsNone(self.profile_env(value))
+        for value in ['1', 'true', 'build.json']:
+            self.assertEqual(value, self.profile_env(value))
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            self.assertIsNone(__main__.profile_env())
@@ -1,19 +1,25 @@
+import datetime
+import os
+import pathlib
+import tempfile
+import threading
 import unittest
+import zipfile
 import mock
 
 import mlog
+from mlog import jinja, manifest, site, util
+from mlog.config import blog_config as config
 
 
 class TestRender(unittest.TestCase):
 
     def setUp(self):
-        blog = mock.Mock(categories={
-            'b': '',
-            'x': '',
-            'a': '',
-            '0': '',
-            '9': '',
-        })
+        blog = mlog.Blog(use_cache=False)
+        blog.posts = [
+            {'categories': ['b', 'x']},
+            {'categories': ['a', '0', '9']},
+        ]
         self.renderer = mlog.render.Renderer(blog)
 
     def test_categories_sorting(self):
@@ -47,3 +53,138 @@ class Test_Render(unittest.TestCase):
         self.renderer.render('/foo/bar', content)
         self.renderer._get_fh.assert_called_with('/foo/bar')
         self.template_writer.called  # TODO: check args.
+
+
+class BlogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.blog = mlog.Blog(use_cache=False)
+        self.blog.posts = [
+            {
+                'title': 'Post {0}'.format(index),
+                'description': '',
+                'content': '<p>Body {0}</p>'.format(index),
+                'author': 'author',
+                'date': datetime.datetime(2015, 1, index + 1),
+                'tags': ['tag {0}'.format(index % 2)],
+                'categories': ['category'],
+                'slug': '{0}.html'.format(index),
+            }
+            for index in range(12)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+
+class TestRenderWorkers(BlogTestCase):
+
+    def render(self, workers):
+        output_dir = pathlib.Path(self.tmp.name, str(workers))
+        renderer = mlog.render.Renderer(
+            self.blog,
+            output_dir=output_dir,
+            template_env=jinja.create_env(
+                jinja.template_loader,
+                bytecode_cache=False),
+            render_workers=workers)
+        renderer.manifest = manifest.Manifest(
+            pathlib.Path(self.tmp.name, 'manifest.json'))
+        renderer._build_digest = ''
+        renderer.site = site.Site()
+        renderer._create_post_pages()
+        renderer._create_tag_pages()
+        renderer._render_jobs()
+        return dict(renderer.site.items())
+
+    def test_parallel_matches_serial(self):
+        serial = self.render(1)
+        self.assertEqual(12 + 3 + 4, len(serial))
+        self.assertEqual(serial, self.render(3))
+
+
+class TestRenderToFiles(BlogTestCase):
+
+    def renderer(self, incremental=False):
+        return mlog.render.Renderer(
+            self.blog,
+            output_dir=pathlib.Path(self.tmp.name, 'html'),
+            template_env=jinja.create_env(
+                jinja.template_loader,
+                bytecode_cache=False),
+            incremental=incremental,
+            manifest_file=pathlib.Path(self.tmp.name, 'manifest.json'),
+            asset_cache_dir=pathlib.Path(self.tmp.name, 'assets'))
+
+    def test_render_to_site(self):
+        uris = set(self.renderer().render_to_site().spider())
+        self.assertTrue(
+            {'index.html', 'atom.xml', 'tag/tag-0/atom.xml', 'sitemap.xml'}
+            <= uris)
+
+    def test_incremental_archive(self):
+        self.renderer().render_to_files()
+        path = pathlib.Path(self.tmp.name, 'site.zip')
+        renderer = self.renderer(incremental=True)
+        renderer.render_to_files(archive=path)
+        self.assertTrue(renderer.incremental)
+        with zipfile.ZipFile(str(path)) as archive:
+            names = set(archive.namelist())
+        output_dir = pathlib.Path(self.tmp.name, 'html')
+        self.assertEqual(
+            {path.relative_to(output_dir).as_posix()
+             for path in output_dir.glob('**/*') if path.is_file()},
+            names)
+        self.assertIn('post/0.html', names)
+        self.assertIn('atom.xml', names)
+
+    @unittest.skipUnless(
+        hasattr(os, 'fork'), 'render workers need fork')
+    def test_no_threads_when_forking(self):
+        threads = []
+        fork = os.fork
+
+        def counted_fork():
+            threads.append(threading.active_count())
+            return fork()
+
+        renderer = self.renderer()
+        renderer.render_workers = 3
+        with mock.patch('os.fork', counted_fork):
+            renderer.render_to_files()
+        self.assertEqual([1, 1, 1], threads)
+        self.assertTrue(
+            pathlib.Path(self.tmp.name, 'html', 'post', '0.html').exists())
+
+    def test_converts_bodies_once(self):
+        self.blog.posts = [
+            util.Post(
+                'Body {0}'.format(index), post['title'], post['tags'],
+                post['categories'], '', post['author'], post['date'],
+                post['slug'])
+            for index, post in enumerate(self.blog.posts)]
+        convert = mock.Mock(side_effect=util._convert_markdown)
+        # Without the cache, as posts outnumber it on large blogs.
+        with mock.patch.object(util, '_cached_convert', convert):
+            self.renderer().render_to_site()
+        self.assertEqual(
+            sorted(post.body for post in self.blog.posts),
+            sorted(args[0] for args, _ in convert.call_args_list))
+
+    def test_assets_changed(self):
+        renderer = self.renderer()
+        renderer._create_assets()
+        before = renderer._create_fragment('stylesheets.html')
+        self.assertIs(before, renderer._create_fragment('stylesheets.html'))
+
+        style_dir = pathlib.Path(self.tmp.name, 'css')
+        style_dir.mkdir()
+        style_dir.joinpath('style.css').write_text('a { color: red; }')
+        with mock.patch.multiple(
+                config,
+                STYLE_DIR=style_dir,
+                ASSET_BUNDLES={'style.css': ('style.css',)}):
+            renderer._create_assets()
+        after = renderer._create_fragment('stylesheets.html')
+        self.assertNotEqual(before, after)
+        self.assertIn(renderer.assets['style.css'].uri, after)
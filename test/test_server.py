@@ -0,0 +1,145 @@
+import pathlib
+import tempfile
+import unittest
+
+import mlog
+from mlog import jinja, server
+
+
+POST = '''title: {0}
+date: {1}
+tags: a
+categories: b
+
+{2}
+'''
+
+
+def post(title, date='2015-01-01', body='Body'):
+    return POST.format(title, date, body)
+
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_changes(self):
+        path = self.dir.joinpath('a', 'post.md')
+        path.parent.mkdir()
+        path.write_text('a')
+        watcher = server.Watcher(self.dir, None)
+        self.assertEqual((set(), set()), watcher.changes())
+
+        path.write_text('changed')
+        self.assertEqual(({str(path)}, set()), watcher.changes())
+
+        path.unlink()
+        self.assertEqual((set(), {str(path)}), watcher.changes())
+
+
+class TestDevServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.posts = self.dir.joinpath('posts')
+        self.posts.mkdir()
+        self.posts.joinpath('first.md').write_text(post('First'))
+        self.blog = mlog.Blog.load(
+            post_dir=self.posts,
+            page_dir=self.dir.joinpath('pages'),
+            use_cache=False)
+        renderer = mlog.Renderer(
+            self.blog,
+            template_env=jinja.create_env(
+                jinja.template_loader,
+                bytecode_cache=False),
+            asset_cache_dir=self.dir.joinpath('assets'))
+        self.server = server.DevServer(self.blog, renderer, poll_interval=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get(self):
+        self.assertIn(b'First', self.server.get('post/first.html'))
+        self.assertIn(b'First', self.server.get('index.html'))
+        self.assertIsNone(self.server.get('post/missing.html'))
+
+    def test_feed(self):
+        content = self.server.get('atom.xml')
+        self.assertIn(b'<feed', content)
+        self.assertIn(b'First', content)
+        self.assertIn(b'<feed', self.server.get('tag/a/atom.xml'))
+
+    def test_asset(self):
+        self.assertIsNone(self.server.get('static/css/missing.css'))
+        asset = self.server.renderer.assets['style.css']
+        self.assertIn(asset.uri.encode('utf-8'), self.server.get('index.html'))
+        self.assertEqual(asset.content, self.server.get(asset.uri))
+
+    def test_reload(self):
+        self.assertIn(b'First', self.server.get('tag/a/index.html'))
+        self.posts.joinpath('first.md').write_text(post('Changed'))
+        self.posts.joinpath('second.md').write_text(post('Second'))
+        content = self.server.get('tag/a/index.html')
+        self.assertIn(b'Changed', content)
+        self.assertIn(b'Second', content)
+        self.assertEqual(2, len(self.blog.posts))
+
+        self.posts.joinpath('second.md').unlink()
+        self.assertIsNone(self.server.get('post/second.html'))
+        self.assertEqual(1, len(self.blog.posts))
+
+    def test_edit_body(self):
+        self.posts.joinpath('second.md').write_text(
+            post('Second', '2014-01-01'))
+        second = self.server.get('post/second.html')
+        self.assertIn(b'Body', self.server.get('post/first.html'))
+        self.assertIn(b'Body', self.server.get('index.html'))
+        routes = self.server._routes
+
+        self.posts.joinpath('first.md').write_text(post('First', body='New'))
+        self.assertIn(b'New', self.server.get('post/first.html'))
+        self.assertIn(b'New', self.server.get('index.html'))
+        self.assertIn(b'New', self.server.get('atom.xml'))
+        # Nothing was planned again and other posts were kept.
+        self.assertIs(routes, self.server._routes)
+        self.assertIs(second, self.server.site.get('post/second.html'))
+
+        self.posts.joinpath('first.md').write_text(
+            post('First', body='New', date='2013-01-01'))
+        self.assertIn(b'New', self.server.get('post/first.html'))
+        self.assertIsNot(routes, self.server._routes)
+        self.assertEqual(
+            ['second.html', 'first.html'],
+            [post['slug'] for post in self.blog.posts])
+
+    def test_errors(self):
+        self.assertIn(b'First', self.server.get('post/first.html'))
+        self.posts.joinpath('first.md').write_text(post('Broken', 'never'))
+        self.posts.joinpath('second.md').write_text(post('Second'))
+        self.assertIn(b'First', self.server.get('post/first.html'))
+        self.assertIn(b'Second', self.server.get('post/second.html'))
+        path = str(self.posts.joinpath('first.md'))
+        self.assertEqual([path], list(self.server.errors))
+        self.assertIn(path, self.server.error_report())
+
+        self.posts.joinpath('first.md').write_text(post('Fixed'))
+        self.assertIn(b'Fixed', self.server.get('post/first.html'))
+        self.assertIsNone(self.server.error_report())
+
+    def test_poll_interval(self):
+        self.server.poll_interval = 60
+        self.assertIn(b'First', self.server.get('post/first.html'))
+        self.posts.joinpath('first.md').write_text(post('Changed'))
+        self.assertIn(b'First', self.server.get('post/first.html'))
+
+    def test_static(self):
+        self.assertIsNotNone(self.server.get_static('static/css/style.css'))
+        self.assertIsNone(self.server.get_static('static/css/missing.css'))
+        self.assertIsNone(self.server.get_static('static/css/../x'))
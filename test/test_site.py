@@ -1,5 +1,9 @@
 import mock
+import pathlib
+import tarfile
+import tempfile
 import unittest
+import zipfile
 
 from mlog import site
 
@@ -63,6 +67,46 @@ class TestSite(unittest.TestCase):
             sorted(['slug', 'foo/slug', 'foo/slug2']),
             sorted(list(self.site.spider())))
 
+    def test_prefix(self):
+        self.site.post(b'a', 'tag/a/index.html')
+        self.site.post(b'b', 'tag/b/index.html')
+        self.site.post(b'c', 'post/c.html')
+        self.assertEqual(
+            ['tag/a/index.html', 'tag/b/index.html'],
+            sorted(self.site.spider('tag/')))
+        self.assertEqual(
+            [('b/index.html', b'b')], list(self.site.tag.items('b')))
+        self.assertIn('post/c.html', self.site)
+        self.assertNotIn('post', self.site)
+
+    def test_delete(self):
+        self.site.post(b'a', 'tag/a/index.html')
+        self.site.post(b'bb', 'tag/b/index.html')
+        self.site.post(b'ccc', 'index.html')
+        self.assertEqual((3, 6), (len(self.site), self.site.size))
+        self.site.delete('tag/a/index.html')
+        self.assertEqual((2, 5), (len(self.site), self.site.size))
+        self.assertRaises(KeyError, self.site.get, 'tag/a')
+        self.site.delete('tag')
+        self.assertEqual(['index.html'], list(self.site.spider()))
+        self.assertEqual((1, 3), (len(self.site), self.site.size))
+        self.assertRaises(KeyError, self.site.delete, 'tag')
+
+    def test_replace(self):
+        self.site.post(b'a', 'a')
+        self.site.post(b'bb', 'a/b')
+        self.assertEqual([('a/b', b'bb')], list(self.site.items()))
+        self.site.post(b'ccc', 'a')
+        self.assertEqual([('a', b'ccc')], list(self.site.items()))
+        self.assertEqual((1, 3), (len(self.site), self.site.size))
+
+    def test_view_post(self):
+        self.site.post(b'a', 'a/b/c')
+        self.site.get('a').post(b'dd', 'b/d')
+        self.assertEqual(b'dd', self.site.get('a/b/d'))
+        self.assertEqual((2, 3), (len(self.site), self.site.size))
+        self.assertEqual(2, len(self.site.a))
+
     def test_parts(self):
         self.assertEqual(['a', 'b', 'c'], self.site._parts('a/b/c'))
         self.assertEqual([''], self.site._parts(''))
@@ -72,3 +116,87 @@ class TestSite(unittest.TestCase):
 
     def test_join(self):
         self.assertEqual('a/b/c', self.site._join('a', 'b', 'c'))
+
+
+class TestSiteOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmp.name)
+        self.site = site.Site()
+        self.site.post(b'index', 'index.html')
+        self.site.post(b'post', 'post/a/slug.html')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_items(self):
+        self.assertEqual(
+            [('index.html', b'index'), ('post/a/slug.html', b'post')],
+            sorted(self.site.items()))
+
+    def test_flush(self):
+        output = self.dir.joinpath('html')
+        self.assertEqual(
+            ['index.html', 'post/a/slug.html'],
+            sorted(self.site.flush(output)))
+        self.assertEqual(
+            b'post', output.joinpath('post', 'a', 'slug.html').read_bytes())
+        self.assertEqual([], self.site.flush(output))
+        self.site.post(b'changed', 'index.html')
+        self.assertEqual(['index.html'], self.site.diff(output))
+        self.assertEqual(['index.html'], self.site.flush(output))
+
+    def test_flush_fingerprints(self):
+        output = self.dir.joinpath('html')
+        fingerprints = {}
+        self.site.flush(output, fingerprints=fingerprints)
+        self.assertEqual(
+            ['index.html', 'post/a/slug.html'], sorted(fingerprints))
+        index = output.joinpath('index.html')
+        mtime = index.stat().st_mtime_ns
+        self.assertEqual([], self.site.flush(output, 1, fingerprints))
+        self.assertEqual(mtime, index.stat().st_mtime_ns)
+
+        # A file changed since the last flush is rewritten.
+        index.write_bytes(b'other')
+        self.assertEqual(
+            ['index.html'], self.site.flush(output, 1, fingerprints))
+        self.assertEqual(b'index', index.read_bytes())
+
+    def test_writer(self):
+        output = self.dir.joinpath('html')
+        fingerprints = {}
+        with site.Writer(output, 2, fingerprints, max_pending=1) as writer:
+            for uri, content in self.site.items():
+                writer.write(uri, content)
+        self.assertEqual(
+            ['index.html', 'post/a/slug.html'], sorted(writer.written))
+        self.assertEqual(
+            b'post', output.joinpath('post', 'a', 'slug.html').read_bytes())
+        self.assertEqual(
+            ['index.html', 'post/a/slug.html'], sorted(fingerprints))
+
+        writer = site.Writer(output, 2, fingerprints)
+        writer.write('index.html', b'index')
+        writer.write('post/b.html', b'b')
+        self.assertEqual(['post/b.html'], writer.close())
+
+    def test_writer_error(self):
+        output = self.dir.joinpath('html')
+        output.mkdir()
+        output.joinpath('post').write_bytes(b'')
+        writer = site.Writer(output, 1)
+        writer.write('post/a/slug.html', b'post')
+        self.assertRaises(OSError, writer.close)
+
+    def test_archive(self):
+        path = self.dir.joinpath('site.zip')
+        self.site.archive(path)
+        with zipfile.ZipFile(str(path)) as archive:
+            self.assertEqual(b'post', archive.read('post/a/slug.html'))
+
+        path = self.dir.joinpath('site.tar.gz')
+        self.site.archive(path)
+        with tarfile.open(str(path)) as archive:
+            self.assertEqual(
+                b'index', archive.extractfile('index.html').read())
@@ -0,0 +1,56 @@
+import gzip
+import unittest
+import xml.etree.ElementTree as ET
+
+from mlog import sitemap
+
+
+NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+class TestSitemap(unittest.TestCase):
+
+    def setUp(self):
+        self.urls = [
+            ('http://example.com/{0}.html'.format(index), '2015-01-01')
+            for index in range(5)]
+
+    def generate(self, **kwargs):
+        return dict(sitemap.generate_sitemaps(
+            'http://example.com/', self.urls, **kwargs))
+
+    def locs(self, content, tag='url'):
+        root = ET.fromstring(content)
+        return [
+            element.find(NS + 'loc').text
+            for element in root.findall(NS + tag)]
+
+    def test_single(self):
+        files = self.generate()
+        self.assertEqual(['sitemap-1.xml', 'sitemap.xml'], list(files))
+        self.assertEqual(
+            [url for url, _ in self.urls], self.locs(files['sitemap-1.xml']))
+        self.assertEqual(
+            ['http://example.com/sitemap-1.xml'],
+            self.locs(files['sitemap.xml'], 'sitemap'))
+
+    def test_split_on_urls(self):
+        files = self.generate(max_urls=2)
+        self.assertEqual(4, len(files))
+        self.assertEqual(
+            ['http://example.com/4.html'], self.locs(files['sitemap-3.xml']))
+
+    def test_split_on_bytes(self):
+        files = self.generate(max_bytes=300)
+        self.assertGreater(len(files), 2)
+        for name in list(files)[:-1]:
+            self.assertLessEqual(len(files[name]), 300)
+
+    def test_compress(self):
+        files = self.generate(compress=True)
+        self.assertEqual(['sitemap-1.xml.gz', 'sitemap.xml'], list(files))
+        self.assertEqual(
+            [url for url, _ in self.urls],
+            self.locs(gzip.decompress(files['sitemap-1.xml.gz'])))
+        # Unchanged sitemaps compress to identical bytes.
+        self.assertEqual(files, self.generate(compress=True))
@@ -1,12 +1,19 @@
+import datetime
 from itertools import islice
+import pathlib
+import pickle
+import tempfile
 import unittest
+import unittest.mock
+
+import dateutil.parser
 
 from mlog import util
+from mlog.config import blog_config as config
+from mlog.constants import PAGE, POST
 
 
-@unittest.mock.patch('mlog.util.strip_html')
-def test_generate_excerpt(strip_html):
-    strip_html.side_effect = lambda x: x
+def test_generate_excerpt():
     assert (
         util.generate_excerpt('a' * 201, length=200) ==
         "<p>{0}...</p>".format('a' * 200))
@@ -20,6 +27,44 @@ def test_generate_excerpt(strip_html):
         "<p>{0}...</p>".format('a' * 400))
 
 
+def test_generate_excerpt_html():
+    html = '<p>a <em>b &amp; <a href="#">c</a></em></p>'
+    assert util.generate_excerpt(html) == '<p>a b &amp; c...</p>'
+    assert (
+        util.generate_excerpt('<p>&lt;&lt;&lt;</p>', length=2) ==
+        '<p>&lt;&lt;...</p>')
+    assert (
+        util.generate_excerpt('<style>p {}</style><p>a</p>', length=5) ==
+        '<p>a...</p>')
+
+
+def test_extract_text_stops_early():
+    html = '<p>' + 'a' * 100 + '</p>' + '<p>unclosed <'
+    assert util.extract_text(html, 10, chunk_size=8) == 'a' * 10
+
+
+def test_parse_date():
+    for value in [
+            '2015-01-01', '2015-01-01 10:30', '2015-01-01T10:30:15.123',
+            '2015-01-01T10:30Z', '2015-01-01 10:30+01:00', '2015/01/02',
+            '01/02/2015', 'January 2, 2015', ' 2015-01-01 ', '20150102',
+            'Jan 2 2015']:
+        expected = dateutil.parser.parse(value)
+        assert util.parse_date(value) == expected
+        assert util.parse_date(value).isoformat() == expected.isoformat()
+
+
+def test_parse_date_formats():
+    assert (
+        util.parse_date('02.01.2015', formats=['%d.%m.%Y']) ==
+        datetime.datetime(2015, 1, 2))
+    assert util.parse_date('2015-01-01') is util.parse_date('2015-01-01')
+
+
+def test_sort_menu():
+    assert util.sort_menu(['c1', 'b', 'C0', '1']) == ['1', 'b', 'C0', 'c1']
+
+
 def test_make_url():
     assert (
         util.make_url('http://example.com', '1', '2', '3.html') ==
@@ -29,6 +74,31 @@ def test_make_url():
         'http://example.com/')
 
 
+def test_url_builder():
+    urls = util.UrlBuilder('http://example.com/')
+    for fragments in [('post', 'a b.html'), ('static', 'css', 'a.css'), ()]:
+        assert (
+            urls(*fragments) ==
+            util.make_url('http://example.com/', *fragments))
+    assert urls('post', 'a.html') is urls('post', 'a.html')
+
+
+def test_url_builder_scheme():
+    urls = util.UrlBuilder('http://example.com/', {'tag': 'topics/{slug}'})
+    assert urls.path('tag', 'a', 'index.html') == 'topics/a/index.html'
+    assert urls('tag', 'a') == 'http://example.com/topics/a'
+    assert urls.path('post', 'a.html') == 'post/a.html'
+
+
+def test_write_atomic():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp, 'a.html')
+        util.write_atomic(path, b'a')
+        util.write_atomic(path, b'b')
+        assert path.read_bytes() == b'b'
+        assert [p.name for p in path.parent.iterdir()] == ['a.html']
+
+
 def test_gen_page_names():
     assert(
         ['index.html', '2.html'] ==
@@ -61,3 +131,125 @@ class TestPager(unittest.TestCase):
         self.assertIsNone(pager._get_filename(2))
         self.assertEqual('index.html', pager._get_filename(0))
         self.assertEqual('2.html', pager._get_filename(1))
+
+
+    def test_iter(self):
+        pager = util.Pager([5, 4, 3, 2, 1], 2)
+        self.assertEqual(
+            [([5, 4], 'index.html', None, '2.html'),
+             ([3, 2], '2.html', 'index.html', '3.html'),
+             ([1], '3.html', '2.html', None)],
+            [(context['items'], context['file_name'],
+              context['prev'], context['next']) for context in pager])
+
+
+class TestStablePager(unittest.TestCase):
+
+    def pages(self, count, per_page=2):
+        pager = util.Pager(list(range(count, 0, -1)), per_page, stable=True)
+        return {
+            context['file_name']: (
+                context['items'], context['prev'], context['next'])
+            for context in pager}
+
+    def test_pages(self):
+        self.assertEqual({}, self.pages(0))
+        self.assertEqual({'index.html': ([1], None, None)}, self.pages(1))
+        self.assertEqual(
+            {'index.html': ([5, 4, 3], None, '1.html'),
+             '1.html': ([2, 1], 'index.html', None)},
+            self.pages(5))
+        self.assertEqual(
+            {'index.html': ([6, 5], None, '2.html'),
+             '2.html': ([4, 3], 'index.html', '1.html'),
+             '1.html': ([2, 1], '2.html', None)},
+            self.pages(6))
+
+    def changed(self, count, per_page=3):
+        before = self.pages(count, per_page)
+        after = self.pages(count + 1, per_page)
+        return sorted(
+            name for name in after if after[name] != before.get(name))
+
+    def test_adding_items_keeps_old_pages(self):
+        self.assertEqual(['index.html'], self.changed(19))
+        # A new page is split off the index.
+        self.assertEqual(['5.html', '6.html', 'index.html'], self.changed(20))
+
+
+class TestReadPosts(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index in range(4):
+            path = pathlib.Path(self.tmp.name, '{0}.md'.format(index))
+            path.write_text(
+                'title: Post {0}\n'
+                'date: 2015-01-0{1}\n'
+                'tags: a, b\n\n'
+                'Body *{0}*\n'.format(index, index + 1))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_post(self):
+        post = util.read_post(self.paths[0])
+        self.assertEqual('Post 0', post['title'])
+        self.assertEqual(['a', 'b'], post['tags'])
+        self.assertEqual('0.html', post['slug'])
+        self.assertEqual(self.paths[0], post['path'])
+        self.assertEqual('<p>Body <em>0</em></p>', post['content'])
+
+    def test_parallel_matches_serial(self):
+        self.assertEqual(
+            util.read_posts(self.paths),
+            util.read_posts(self.paths, workers=2))
+
+
+class TestPost(unittest.TestCase):
+
+    def test_split_meta(self):
+        meta, body = util.split_meta(
+            '---\nTitle: a\nTags: b,\n    c\n---\nBody\n\nkey: value')
+        self.assertEqual({'title': ['a'], 'tags': ['b,', 'c']}, meta)
+        self.assertEqual('Body\n\nkey: value', body)
+
+    def test_split_meta_without_meta(self):
+        self.assertEqual(({}, 'Body\ntext'), util.split_meta('Body\ntext'))
+
+    def _post(self, body='Body *a*', cls=util.Post, **kwargs):
+        fields = dict(
+            title='a', tags=['b'], categories=['c'], menu_name='a',
+            author='d', date=datetime.datetime(2016, 1, 1), slug='a.html')
+        fields.update(kwargs)
+        return cls(body, **fields)
+
+    def test_content_converted_on_access(self):
+        post = self._post()
+        self.assertEqual('<p>Body <em>a</em></p>', post['content'])
+        self.assertEqual('<p>Body a...</p>', post['description'])
+        self.assertIs(post.excerpt, post['description'])
+        self.assertFalse(hasattr(post, '__dict__'))
+
+    def test_description(self):
+        post = self._post(description='given')
+        self.assertEqual('given', post['description'])
+        with self.assertRaises(KeyError):
+            post['missing']
+        self.assertIsNone(post.get('missing'))
+
+    def test_url(self):
+        self.assertEqual(
+            util.make_url(config.BASE_URL, POST, 'a.html'),
+            self._post().url)
+        self.assertEqual(
+            util.make_url(config.BASE_URL, PAGE, 'a.html'),
+            self._post(cls=util.Page).url)
+
+    def test_pickle(self):
+        post = self._post('*a*')
+        self.assertEqual(post, pickle.loads(pickle.dumps(post)))
+        self.assertEqual(
+            '<p><em>a</em></p>', pickle.loads(pickle.dumps(post))['content'])